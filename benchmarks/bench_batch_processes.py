@@ -0,0 +1,101 @@
+"""Batch throughput with the image work on 0..N worker processes.
+
+Run from the repository root:
+
+    python benchmarks/bench_batch_processes.py [--items 48] [--concurrency 16] [--processes 0,1,2,4]
+
+Writes --items camera-sized JPEGs (some with an EXIF rotation) to a
+scratch folder and runs them through BatchRunner against
+benchmarks/stub_providers.py, once per --processes setting (default: 0,
+then powers of two up to the core count). 0 keeps the image work on the
+item threads. Each run uses its own product name, so the analysis cache
+never answers. Reports items per second and the speed-up over 0, and
+exits non-zero if any item fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["QUICKLIST_CACHE_DIR"] = tempfile.mkdtemp(prefix="quicklist-bench-")
+
+import stub_providers  # noqa: E402
+
+
+def write_photos(folder: str, count: int, size: tuple) -> None:
+    """Smooth gradients plus sensor-like noise, so decode and encode cost what real photos do"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(7)
+    height, width = size[1], size[0]
+    ramp = np.linspace(0, 1, width, dtype=np.float32)[np.newaxis, :, np.newaxis]
+    for n in range(count):
+        base = rng.integers(40, 200, 3).astype(np.float32)
+        pixels = base * (0.6 + 0.4 * ramp) + rng.normal(0, 12, (height, width, 3))
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        exif = Image.Exif()
+        if n % 3 == 0:
+            exif[0x0112] = 6  # orientation: rotated 90 degrees
+        image.save(os.path.join(folder, f"item-{n:03d}.jpg"), quality=90, exif=exif)
+
+
+def default_settings() -> list:
+    settings = [0]
+    n = 1
+    while n <= (os.cpu_count() or 1):
+        settings.append(n)
+        n *= 2
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=16, help="items in flight")
+    parser.add_argument("--processes", help="comma-separated process counts to compare")
+    parser.add_argument("--size", default="3024x4032", help="photo size, WIDTHxHEIGHT")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub provider latency (s)")
+    args = parser.parse_args()
+    settings = [int(n) for n in args.processes.split(",")] if args.processes else default_settings()
+
+    stub = stub_providers.start(latency=args.latency)
+    os.environ.update(stub_providers.environment(stub))
+
+    import quicklist
+
+    folder = tempfile.mkdtemp(prefix="quicklist-photos-")
+    size = tuple(int(n) for n in args.size.lower().split("x"))
+    write_photos(folder, args.items, size)
+
+    print(f"{args.items} photos of {size[0]}x{size[1]}, {args.concurrency} items in flight, "
+          f"{os.cpu_count()} cores, {args.latency:.2f}s provider latency")
+    baseline = None
+    failures = 0
+    for processes in settings:
+        items = quicklist.load_folder(folder)
+        for item in items:
+            item.product_name = f"Dress {processes}"
+        output = os.path.join(folder, f"run-{processes}.jsonl")
+        runner = quicklist.BatchRunner(output, args.concurrency, processes=processes)
+
+        started = time.perf_counter()
+        counts = runner.run(items)
+        rate = args.items / (time.perf_counter() - started)
+
+        baseline = baseline or rate
+        failures += counts["failed"]
+        print(f"  processes {processes:2d}: {rate:6.2f} items/s   x{rate / baseline:4.2f}   "
+              f"({counts['done']} done, {counts['failed']} failed)")
+
+    stub.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
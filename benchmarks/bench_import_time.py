@@ -0,0 +1,84 @@
+"""Guard the start-up cost of the listing engine and the CLI.
+
+Run from the repository root:
+
+    python benchmarks/bench_import_time.py [--budget-ms 250] [--runs 5]
+
+Imports quicklist in fresh interpreters under `python -X importtime`
+and reports the best cumulative time plus the slowest modules pulled
+in. Exits non-zero if the import loads Streamlit or any dependency that
+is meant to stay lazy, or if it exceeds the time budget. Bytecode
+caching is switched on for the runs, since an uncached compile of the
+engine would otherwise dominate.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only imported when a tier or an image stage actually needs them
+LAZY = ["streamlit", "numpy", "PIL", "requests", "httpx", "asyncio", "multiprocessing", "groq", "boto3", "botocore", "urllib3"]
+
+CHECK = "import sys, quicklist; print(','.join(m for m in {lazy!r} if m in sys.modules))"
+
+
+def run(args, env):
+    return subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def importtime(env):
+    """(total microseconds, [(cumulative us, module)]) for one fresh import"""
+    result = run(["-X", "importtime", "-c", "import quicklist"], env)
+    modules = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((int(cumulative), name))
+        if name == "quicklist":
+            total = int(cumulative)
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    run(["-c", "import quicklist"], env)  # warm the bytecode cache
+
+    failures = []
+    loaded = run(["-c", CHECK.format(lazy=LAZY)], env).stdout.strip()
+    if loaded:
+        failures.append(f"import quicklist loaded: {loaded}")
+
+    best, modules = min(importtime(env) for _ in range(args.runs))
+    print(f"import quicklist: {best / 1000:.1f} ms (best of {args.runs})")
+    print("slowest imports (cumulative):")
+    for cumulative, name in sorted(modules, reverse=True)[:10]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    if best / 1000 > args.budget_ms:
+        failures.append(f"import took {best / 1000:.1f} ms, budget {args.budget_ms:.0f} ms")
+
+    # What a warehouse script pays before any work starts
+    started = time.perf_counter()
+    run(["cli.py", "--help"], env)
+    print(f"\ncli.py --help wall time: {(time.perf_counter() - started) * 1000:.0f} ms")
+    started = time.perf_counter()
+    run(["-c", "import quicklist"], env)
+    print(f"python -c 'import quicklist' wall time: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
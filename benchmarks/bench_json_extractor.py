@@ -0,0 +1,234 @@
+"""Fuzz and time the tolerant JsonExtractor against the old clean+json.loads path.
+
+Run from the repository root:
+
+    python benchmarks/bench_json_extractor.py [--cases N] [--seed S]
+
+Builds a deterministic fuzz corpus from a handful of seed listings by
+applying the defects LLMs actually produce (prose and code fences around
+the object, trailing commas, curly quotes, raw newlines, bare inner
+quotes, Python reprs, missing commas, a second object, a {placeholder}
+or example object before the listing, truncation),
+checks what each parser recovers, then reports throughput for one-shot
+and token-sized incremental feeding. Exits non-zero if the extractor
+fails a case it is expected to recover or if chunked feeding ever
+disagrees with one-shot parsing.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quicklist import LISTING_KEYS, JsonExtractor, extract_json  # noqa: E402
+
+SEEDS = [
+    {
+        "title": "Vintage Levi's 501 High-Rise Jeans",
+        "description": "Classic \"mom\" fit in rigid denim. Fits sizes {26, 27} best - see measurements.",
+        "bullet_points": ["100% cotton denim", "Button fly", "Five-pocket styling", "High rise", "Light wash"],
+        "meta_description": "Vintage Levi's 501 jeans, light wash, high rise.",
+    },
+    {
+        "title": "Silk Wrap Midi Dress – Emerald",
+        "description": "Fluid silk charmeuse with a self-tie waist.\nDry clean only.",
+        "bullet_points": ["Pure silk", "Self-tie waist", "Midi length", "Lined bodice", "Made in Italy"],
+        "meta_description": "Emerald silk wrap midi dress with self-tie waist",
+    },
+    {
+        "title": "Leather Crossbody Bag",
+        "description": "Soft pebbled leather, adjustable strap, café-au-lait tone. A \"forever\" bag.",
+        "bullet_points": ["Genuine leather", "Adjustable strap", "Zip closure", "Interior pocket", "Gold hardware"],
+        "meta_description": "Pebbled leather crossbody bag",
+        "primary_keywords": ["leather crossbody", "crossbody bag", "pre-owned bag", "brown bag", "leather bag"],
+        "long_tail_keywords": ["buy leather crossbody bag online", "secondhand leather bag", "thrift crossbody",
+                               "pebbled leather bag", "gold hardware bag", "zip crossbody", "brown leather bag",
+                               "everyday crossbody bag"],
+    },
+    {"title": "Wool Overcoat", "description": "Double-breasted, 80% wool.", "bullet_points": [],
+     "meta_description": "", "rating": 4.5, "in_stock": True, "discount": None},
+]
+
+
+def legacy_parse(text):
+    """The pre-extractor path: strip fences, slice first { to last }, json.loads"""
+    text = re.sub(r'```json\s*|\s*```', '', text, flags=re.IGNORECASE)
+    start = text.find('{')
+    end = text.rfind('}') + 1
+    if start != -1 and end > start:
+        text = text[start:end]
+    return json.loads(text)
+
+
+def smart_quoted(value):
+    """Serialize with curly quotes as delimiters (inner quotes left as they are)"""
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"“{k}”: {smart_quoted(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(smart_quoted(v) for v in value) + "]"
+    if isinstance(value, str):
+        return "“" + json.dumps(value, ensure_ascii=False)[1:-1] + "”"
+    return json.dumps(value)
+
+
+def with_trailing_commas(value, indent=""):
+    """Pretty-print with a comma after the last element of every container"""
+    inner = indent + "  "
+    if isinstance(value, dict):
+        items = "".join(f"\n{inner}{json.dumps(k)}: {with_trailing_commas(v, inner)}," for k, v in value.items())
+        return "{" + items + f"\n{indent}}}"
+    if isinstance(value, list):
+        items = "".join(f"\n{inner}{with_trailing_commas(v, inner)}," for v in value)
+        return "[" + items + f"\n{indent}]"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def mutations(seed, rng):
+    """(name, text, expect) where expect is 'exact', 'prefix' or 'unrecoverable'"""
+    plain = json.dumps(seed, ensure_ascii=rng.random() < 0.5)
+    pretty = json.dumps(seed, indent=2, ensure_ascii=False)
+    yield "plain", plain, "exact"
+    yield "pretty", pretty, "exact"
+    yield "fenced", f"Here is the listing you asked for:\n```json\n{pretty}\n```\nLet me know if you want changes {{or tweaks}}!", "exact"
+    yield "trailing_commas", with_trailing_commas(seed), "exact"
+    yield "smart_quotes", smart_quoted(seed), "exact"
+    yield "raw_newlines", plain.replace("\\n", "\n"), "exact"
+    yield "bare_inner_quotes", plain.replace('\\"', '"'), "exact"
+    yield "python_repr", repr(seed), "exact"
+    yield "missing_commas", re.sub(r',\n', '\n', pretty), "exact"
+    yield "inline_no_commas", re.sub(r'", ("[^"\\]*": )', r'" \1', plain), "exact"
+    yield "second_object", plain + "\n" + json.dumps({"title": "ignored"}), "exact"
+    yield "prose_brace_first", "Note: {fields} are below. " + plain, "exact"
+    yield "prose_object_first", "Here is {the answer}: " + plain, "exact"
+    yield "example_first", 'Format: {"ok": true}\n' + with_trailing_commas(seed), "exact"
+    for _ in range(6):
+        cut = rng.randrange(plain.index(":") + 1, len(plain) - 1)
+        yield "truncated", plain[:cut], "prefix"
+    yield "no_object", "Sorry, I can't help with that.", "unrecoverable"
+
+
+def is_prefix_of(partial, full):
+    """Truncation recovery may only drop or shorten, never invent"""
+    if isinstance(partial, dict):
+        return isinstance(full, dict) and all(k in full and is_prefix_of(v, full[k]) for k, v in partial.items())
+    if isinstance(partial, list):
+        return (isinstance(full, list) and len(partial) <= len(full)
+                and all(is_prefix_of(p, f) for p, f in zip(partial, full)))
+    if isinstance(partial, str):
+        return isinstance(full, str) and full.startswith(partial)
+    if isinstance(partial, (int, float)) and not isinstance(partial, bool) and isinstance(full, (int, float)):
+        return str(full).startswith(str(partial).rstrip("0").rstrip("."))
+    return partial == full
+
+
+def feed_chunked(text, rng):
+    extractor = JsonExtractor(LISTING_KEYS)
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 8)
+        extractor.feed(text[position:position + size])
+        position += size
+    return extractor.finish()
+
+
+def build_corpus(cases, rng):
+    corpus = []
+    while len(corpus) < cases:
+        for seed in SEEDS:
+            for name, text, expect in mutations(seed, rng):
+                corpus.append((name, text, expect, seed))
+    return corpus[:cases]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    corpus = build_corpus(args.cases, rng)
+
+    results = {}
+    failures = 0
+    for name, text, expect, seed in corpus:
+        row = results.setdefault(name, {"cases": 0, "legacy": 0, "extractor": 0})
+        row["cases"] += 1
+        try:
+            row["legacy"] += legacy_parse(text) == seed
+        except ValueError:
+            pass
+
+        try:
+            extraction = extract_json(text, LISTING_KEYS)
+        except ValueError:
+            extraction = None
+        if expect == "unrecoverable":
+            ok = extraction is None
+        elif extraction is None:
+            ok = False
+        elif expect == "exact":
+            ok = extraction.value == seed
+        else:
+            ok = is_prefix_of(extraction.value, seed)
+        row["extractor"] += ok
+
+        try:
+            chunked = feed_chunked(text, rng)
+        except ValueError:
+            chunked = None
+        consistent = (chunked is None and extraction is None) or (
+            chunked is not None and extraction is not None and chunked.value == extraction.value)
+        if not ok or not consistent:
+            failures += 1
+            if failures <= 10:
+                print(f"FAIL {name} (consistent={consistent}): {text[:120]!r}\n"
+                      f"  got {extraction.value if extraction else None!r}")
+
+    print(f"{'mutation':<18} {'cases':>6} {'legacy':>8} {'extractor':>10}")
+    for name, row in results.items():
+        print(f"{name:<18} {row['cases']:>6} {row['legacy'] / row['cases']:>8.0%} "
+              f"{row['extractor'] / row['cases']:>10.0%}")
+    print(f"{failures} failures in {len(corpus)} cases\n")
+
+    # Throughput on well-formed responses, the common case
+    texts = [json.dumps(seed, indent=2, ensure_ascii=False) for seed in SEEDS]
+    size_mb = sum(len(text.encode()) for text in texts) / 1e6
+    chunks = [[text[i:i + 4] for i in range(0, len(text), 4)] for text in texts]
+
+    def run_legacy():
+        for text in texts:
+            legacy_parse(text)
+
+    def run_oneshot():
+        for text in texts:
+            extract_json(text)
+
+    def run_tolerant():
+        for text in texts:
+            extractor = JsonExtractor()
+            extractor.feed(text)
+            extractor.finish()
+
+    def run_streamed():
+        for pieces in chunks:
+            extractor = JsonExtractor()
+            for piece in pieces:
+                extractor.feed(piece)
+            extractor.finish()
+
+    rounds = 200
+    for label, fn in (("legacy json.loads", run_legacy), ("extract_json", run_oneshot),
+                      ("tolerant scanner", run_tolerant), ("scanner, 4-char feed", run_streamed)):
+        best = min(timeit.repeat(fn, number=rounds, repeat=5))
+        print(f"{label:>22}: {size_mb * rounds / best:8.1f} MB/s  "
+              f"({best / (rounds * len(texts)) * 1e6:7.1f} us per response)")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Exercise and load the HTTP service against local stub providers.
+
+Run from the repository root:
+
+    python benchmarks/bench_service.py [--requests 64] [--stations 16] [--workers 8] [--latency 0.3]
+
+Starts benchmarks/stub_providers.py and service.py in this process, with
+every provider tier pointed at the stub and a throwaway cache directory.
+Checks each endpoint once, including a batch round trip, then has
+--stations concurrent clients post --requests distinct photos to
+/listing. Reports throughput and latency percentiles and exits non-zero
+if any response is wrong.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["QUICKLIST_CACHE_DIR"] = tempfile.mkdtemp(prefix="quicklist-bench-")
+
+import stub_providers  # noqa: E402
+
+
+def photo(rng: random.Random) -> str:
+    """A distinct base64 JPEG per call, so the analysis cache never answers"""
+    from PIL import Image
+
+    image = Image.new("RGB", (320, 400), tuple(rng.randrange(256) for _ in range(3)))
+    image.putpixel((rng.randrange(320), rng.randrange(400)), (255, 255, 255))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def call(base: str, path: str, body: dict = None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    request = urllib.request.Request(base + path, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def check_endpoints(base: str, rng: random.Random) -> list:
+    failures = []
+
+    def expect(condition, message):
+        if not condition:
+            failures.append(message)
+
+    image = photo(rng)
+    status, analysis = call(base, "/analyze", {"image": image})
+    expect(status == 200 and analysis.get("provider") == "google", f"/analyze: {status} {analysis}")
+
+    status, generated = call(base, "/generate", {"analysis": analysis, "price": "$30"})
+    expect(status == 200 and generated.get("description", {}).get("title"), f"/generate: {status} {generated}")
+    description = generated.get("description", {})
+
+    status, keywords = call(base, "/keywords", {"analysis": analysis, "description": description})
+    expect(status == 200 and len(keywords.get("primary", [])) >= 5, f"/keywords: {status} {keywords}")
+
+    status, formatted = call(base, "/format", {"description": description, "keywords": keywords,
+                                               "platform": "Etsy"})
+    expect(status == 200 and list(formatted) == ["Etsy"], f"/format: {status} {formatted}")
+
+    status, error = call(base, "/analyze", {"image": "not base64!"})
+    expect(status == 400, f"/analyze with a bad image: {status} {error}")
+
+    status, batch = call(base, "/batches", {"items": [{"image": photo(rng)} for _ in range(3)]})
+    expect(status == 200 and batch.get("items") == 3, f"/batches: {status} {batch}")
+    deadline = time.monotonic() + 60
+    while status == 200 and time.monotonic() < deadline:
+        status, progress = call(base, f"/batches/{batch['id']}")
+        if progress.get("status") in ("done", "failed"):
+            break
+        time.sleep(0.2)
+    expect(progress.get("counts") == {"done": 3, "failed": 0, "skipped": 0}, f"/batches/<id>: {progress}")
+
+    status, health = call(base, "/health")
+    expect(status == 200 and "breakers" in health, f"/health: {status}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--stations", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--workers", type=int, default=8, help="service worker pool size")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub provider latency (s)")
+    args = parser.parse_args()
+
+    stub = stub_providers.start(latency=args.latency)
+    os.environ.update(stub_providers.environment(stub))
+
+    import service
+
+    server = service.serve(port=0, workers=args.workers, queue_limit=args.requests)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    rng = random.Random(5)
+    failures = check_endpoints(base, rng)
+    for failure in failures:
+        print(f"FAIL {failure}")
+
+    photos = [photo(rng) for _ in range(args.requests)]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def station(indices):
+        for index in indices:
+            started = time.perf_counter()
+            status, listing = call(base, "/listing", {"image": photos[index]})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if status != 200 or not listing.get("formatted"):
+                    errors.append(f"{status} {str(listing)[:120]}")
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=station, args=(range(n, args.requests, args.stations),))
+               for n in range(args.stations)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{args.requests} listings from {args.stations} stations, {args.workers} workers, "
+          f"{args.latency:.2f}s provider latency")
+    print(f"  throughput {args.requests / wall:6.2f} listings/s   wall {wall:.1f}s")
+    print(f"  latency p50 {latencies[len(latencies) // 2]:.2f}s   "
+          f"p90 {latencies[min(len(latencies) - 1, int(0.9 * len(latencies)))]:.2f}s   max {latencies[-1]:.2f}s")
+    for error in errors[:5]:
+        print(f"FAIL /listing: {error}")
+
+    server.shutdown()
+    stub.shutdown()
+    sys.exit(1 if failures or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
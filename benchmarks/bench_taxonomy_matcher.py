@@ -0,0 +1,219 @@
+"""Compare the compiled TermMatcher against the old `any(term in text)` chains.
+
+Run from the repository root:
+
+    python benchmarks/bench_taxonomy_matcher.py
+
+Prints per-call timings for both implementations and every sample on
+which they disagree (mostly substring false positives the matcher fixes).
+"""
+import os
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quicklist import QuickListAI  # noqa: E402
+
+
+def legacy_parse_google_vision(labels: List[str], objects: List[str], product_name: str) -> tuple:
+    """Pre-matcher implementation, kept for comparison"""
+    all_tags = ' '.join(labels + objects).lower()
+    prod_lower = product_name.lower()
+    combined = all_tags + ' ' + prod_lower
+
+    # COMPREHENSIVE CLOTHING DETECTION - Check specific items FIRST
+
+    # TOPS
+    if any(term in combined for term in [
+        'blouse', 'shirt', 'top', 'tee', 't-shirt', 'tank', 'cami', 'camisole',
+        'crop top', 'tube top', 'halter', 'bodysuit', 'bustier', 'corset',
+        'tunic', 'henley', 'polo', 'button-up', 'peplum'
+    ]):
+        return "Apparel & Fashion", "Top"
+
+    # DRESSES
+    elif any(term in combined for term in [
+        'dress', 'gown', 'frock', 'maxi', 'midi', 'mini', 'sundress',
+        'wrap dress', 'bodycon', 'shift', 'a-line', 'sheath', 'cocktail'
+    ]):
+        return "Apparel & Fashion", "Dress"
+
+    # SKIRTS
+    elif any(term in combined for term in [
+        'skirt', 'mini skirt', 'midi skirt', 'maxi skirt', 'pencil skirt',
+        'pleated skirt', 'tennis skirt', 'skort'
+    ]):
+        return "Apparel & Fashion", "Skirt"
+
+    # PANTS
+    elif any(term in combined for term in [
+        'pants', 'jeans', 'trousers', 'slacks', 'chinos', 'leggings',
+        'joggers', 'sweatpants', 'cargo', 'palazzo', 'culottes', 'wide leg',
+        'skinny', 'mom jeans', 'boyfriend jeans'
+    ]):
+        return "Apparel & Fashion", "Pants"
+
+    # SHORTS
+    elif any(term in combined for term in [
+        'shorts', 'bermuda', 'cutoffs', 'bike shorts'
+    ]):
+        return "Apparel & Fashion", "Shorts"
+
+    # OUTERWEAR
+    elif any(term in combined for term in [
+        'jacket', 'coat', 'blazer', 'cardigan', 'sweater', 'pullover',
+        'hoodie', 'sweatshirt', 'bomber', 'denim jacket', 'leather jacket',
+        'parka', 'puffer', 'peacoat', 'trench', 'windbreaker', 'cape',
+        'vest', 'kimono', 'fleece', 'teddy coat'
+    ]):
+        return "Apparel & Fashion", "Jacket"
+
+    # JUMPSUITS
+    elif any(term in combined for term in [
+        'jumpsuit', 'romper', 'playsuit', 'overall', 'coverall'
+    ]):
+        return "Apparel & Fashion", "Jumpsuit"
+
+    # BAGS
+    elif any(term in combined for term in [
+        'bag', 'purse', 'handbag', 'tote', 'clutch', 'satchel', 'crossbody',
+        'messenger', 'backpack', 'duffel', 'bucket bag', 'fanny pack'
+    ]):
+        return "Bags & Accessories", "Bag"
+
+    # SHOES
+    elif any(term in combined for term in [
+        'shoes', 'sneakers', 'boots', 'heels', 'sandals', 'pumps', 'stilettos',
+        'platforms', 'wedges', 'ankle boots', 'combat boots', 'trainers',
+        'loafers', 'oxfords', 'flats', 'espadrilles', 'mules'
+    ]):
+        return "Footwear", "Shoes"
+
+    # Generic clothing fallback
+    elif any(term in combined for term in ['clothing', 'apparel', 'fashion', 'wear', 'garment']):
+        return "Apparel & Fashion", "Clothing"
+
+    # Default
+    return "Product", "Item"
+
+
+def legacy_detect_materials_style(labels: List[str], category: str) -> tuple:
+    """Pre-matcher implementation, kept for comparison"""
+    materials = ["Quality", "Fabric"]
+    style = "Classic"
+
+    all_labels = ' '.join(labels).lower()
+
+    # COMPREHENSIVE MATERIAL DETECTION
+    if any(mat in all_labels for mat in ['silk', 'satin', 'charmeuse']):
+        materials = ["Silk", "Luxurious"]
+    elif any(mat in all_labels for mat in ['cotton', 'organic']):
+        materials = ["Cotton", "Breathable"]
+    elif any(mat in all_labels for mat in ['linen', 'flax']):
+        materials = ["Linen", "Natural"]
+    elif any(mat in all_labels for mat in ['wool', 'cashmere', 'merino']):
+        materials = ["Wool", "Warm"]
+    elif any(mat in all_labels for mat in ['leather', 'suede', 'nubuck']):
+        materials = ["Leather", "Premium"]
+    elif any(mat in all_labels for mat in ['denim', 'chambray']):
+        materials = ["Denim", "Durable"]
+    elif any(mat in all_labels for mat in ['velvet', 'velour', 'plush']):
+        materials = ["Velvet", "Plush"]
+    elif any(mat in all_labels for mat in ['chiffon', 'georgette', 'sheer']):
+        materials = ["Chiffon", "Lightweight"]
+    elif any(mat in all_labels for mat in ['knit', 'sweater', 'cable']):
+        materials = ["Knit", "Cozy"]
+    elif any(mat in all_labels for mat in ['polyester', 'poly']):
+        materials = ["Polyester", "Wrinkle-resistant"]
+    elif any(mat in all_labels for mat in ['stretch', 'spandex', 'lycra']):
+        materials = ["Stretch", "Comfortable"]
+    elif any(mat in all_labels for mat in ['sequin', 'glitter', 'sparkle']):
+        materials = ["Sequin", "Sparkling"]
+    elif any(mat in all_labels for mat in ['lace', 'crochet', 'eyelet']):
+        materials = ["Lace", "Delicate"]
+    elif any(mat in all_labels for mat in ['mesh', 'net', 'tulle']):
+        materials = ["Mesh", "Sheer"]
+    elif any(mat in all_labels for mat in ['fleece', 'sherpa', 'teddy']):
+        materials = ["Fleece", "Warm"]
+    elif category == "Apparel & Fashion":
+        materials = ["Fabric", "Quality Material"]
+
+    # COMPREHENSIVE STYLE DETECTION
+    if any(s in all_labels for s in ['elegant', 'formal', 'evening', 'sophisticated', 'luxury', 'cocktail']):
+        style = "Elegant"
+    elif any(s in all_labels for s in ['casual', 'everyday', 'comfortable', 'relaxed']):
+        style = "Casual"
+    elif any(s in all_labels for s in ['vintage', 'retro', 'classic', 'antique', 'throwback']):
+        style = "Vintage"
+    elif any(s in all_labels for s in ['modern', 'contemporary', 'trendy', 'fashion-forward', 'chic']):
+        style = "Modern"
+    elif any(s in all_labels for s in ['boho', 'bohemian', 'hippie', 'festival', 'free spirit']):
+        style = "Boho"
+    elif any(s in all_labels for s in ['romantic', 'feminine', 'delicate', 'soft', 'dreamy']):
+        style = "Romantic"
+    elif any(s in all_labels for s in ['edgy', 'bold', 'statement', 'punk', 'grunge']):
+        style = "Edgy"
+    elif any(s in all_labels for s in ['preppy', 'classic', 'collegiate', 'ivy league']):
+        style = "Preppy"
+    elif any(s in all_labels for s in ['athletic', 'sporty', 'activewear', 'performance']):
+        style = "Athletic"
+    elif any(s in all_labels for s in ['minimalist', 'minimal', 'simple', 'clean']):
+        style = "Minimalist"
+    elif any(s in all_labels for s in ['glamorous', 'glam', 'sparkle', 'luxe']):
+        style = "Glamorous"
+
+    return materials, style
+
+
+SAMPLES = [
+    (["clothing", "sleeve", "outerwear", "denim", "jacket"], ["jacket"], "vintage denim jacket"),
+    (["dress", "day dress", "pattern", "cocktail dress"], ["dress"], "floral midi dress"),
+    (["footwear", "shoe", "sneakers", "white"], ["shoe"], ""),
+    (["bag", "handbag", "leather", "fashion accessory"], ["handbag"], "leather tote"),
+    (["laptop", "cabinet", "furniture"], [], ""),
+    (["minimalist", "t-shirt", "cotton"], ["top"], "minimalist tee"),
+    (["sweater", "wool", "knit", "pattern"], [], "cable knit sweater"),
+    (["skirt", "pleat", "fashion"], [], "pleated maxi skirt"),
+    (["textile", "pattern", "magenta"], [], "cabinet net curtain"),
+    (["jeans", "pocket", "denim", "trousers"], ["jeans"], "mom jeans"),
+    # Typical full Google Vision responses: 10 labels + objects, garment late or absent
+    (["sleeve", "collar", "neck", "pattern", "textile", "electric blue", "fashion design",
+      "pocket", "button", "embellishment"], ["outerwear", "person"], ""),
+    (["brown", "wood", "rectangle", "font", "hardwood", "tints and shades", "beige",
+      "metal", "composite material", "still life photography"], ["packaged goods"], "item 4471"),
+    (["footwear", "outdoor shoe", "grey", "walking shoe", "sportswear", "athletic shoe",
+      "synthetic rubber", "running shoe", "font", "brand"], ["shoe", "shoe"], "grey running sneakers"),
+]
+
+
+def main():
+    disagreements = 0
+    for labels, objects, name in SAMPLES:
+        old = (legacy_parse_google_vision(labels, objects, name), legacy_detect_materials_style(labels, "Apparel & Fashion"))
+        category, specific_type, materials, style = QuickListAI._analyze_labels(labels, objects, name)
+        new = ((category, specific_type), (materials, style))
+        old = (old[0], legacy_detect_materials_style(labels, old[0][0]))
+        if old != new:
+            disagreements += 1
+            print(f"{labels + objects} / {name!r}\n  old: {old}\n  new: {new}")
+    print(f"{disagreements}/{len(SAMPLES)} samples differ\n")
+    
+    def run_old():
+        for labels, objects, name in SAMPLES:
+            category, _ = legacy_parse_google_vision(labels, objects, name)
+            legacy_detect_materials_style(labels, category)
+    
+    def run_new():
+        for labels, objects, name in SAMPLES:
+            QuickListAI._analyze_labels(labels, objects, name)
+    
+    rounds = 2000
+    for label, fn in (("any() chains", run_old), ("TermMatcher", run_new)):
+        best = min(timeit.repeat(fn, number=rounds, repeat=5))
+        print(f"{label:>14}: {best / (rounds * len(SAMPLES)) * 1e6:7.1f} us per item")
+
+
+if __name__ == "__main__":
+    main()
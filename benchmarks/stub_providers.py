@@ -0,0 +1,152 @@
+"""Local stand-ins for the vision and LLM providers.
+
+Run from the repository root:
+
+    python benchmarks/stub_providers.py [--port 8765] [--latency 0.3]
+
+Answers the request shapes QuickList sends, after a fixed latency:
+Google Vision annotate, the OpenAI-compatible chat endpoints (Groq,
+DeepInfra, Together; streamed or not), DeepInfra inference,
+Pollinations and Hugging Face text generation. Listings are built from
+the prompt and name only the detected color, so they pass validation.
+Prints the environment that points every tier at the stub.
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_KEY = "stub"
+
+
+def listing_for(prompt: str) -> dict:
+    """A listing that follows the prompt's rules (and keyword schema, when asked)"""
+    color = re.search(r"DETECTED COLOR: (.+)", prompt)
+    color = color.group(1).strip() if color and "NOT SPECIFIED" not in color.group(1) else ""
+    kind = re.search(r"Type: (.+)", prompt)
+    kind = kind.group(1).strip().lower() if kind else "item"
+    words = f"{color.lower()} {kind}".strip()
+    listing = {
+        "title": f"{color} {kind.title()}".strip(),
+        "description": f"A {words} in excellent pre-owned condition, ready for its next wardrobe.",
+        "bullet_points": [f"{words.capitalize()}", "Gently used", "Ships fast", "Quality checked", "Easy returns"],
+        "meta_description": f"Pre-owned {words}.",
+    }
+    if "primary_keywords" in prompt or "Generate SEO keywords" in prompt:
+        primary = [f"{words} {n}" for n in ("", "pre-owned", "secondhand", "used", "resale", "thrift",
+                                            "vintage", "sale")]
+        long_tail = [f"buy {words} online {n}".strip() for n in range(12)]
+        if "Generate SEO keywords" in prompt:
+            return {"primary": primary, "long_tail": long_tail}
+        listing.update(primary_keywords=primary, long_tail_keywords=long_tail)
+    return listing
+
+
+def vision_response() -> dict:
+    return {"responses": [{
+        "labelAnnotations": [{"description": name} for name in ("Clothing", "Dress", "Cotton", "Sleeve")],
+        "localizedObjectAnnotations": [{"name": "Dress"}],
+        "imagePropertiesAnnotation": {"dominantColors": {"colors": [
+            {"color": {"red": 30, "green": 60, "blue": 160}, "score": 0.8},
+        ]}},
+    }]}
+
+
+def make_handler(latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send(self, payload, content_type="application/json") -> None:
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            request = json.loads(body) if self.headers.get("Content-Type", "").startswith("application/json") else {}
+            time.sleep(latency)
+
+            if self.path.startswith("/v1/images:annotate"):
+                self.send(vision_response())
+                return
+            if "messages" in request:
+                prompt = request["messages"][-1]["content"]
+            else:
+                prompt = request.get("input") or request.get("inputs") or ""
+            text = json.dumps(listing_for(prompt))
+
+            if self.path.endswith("chat/completions") and request.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for start in range(0, len(text), 24):
+                    chunk = {"choices": [{"delta": {"content": text[start:start + 24]}}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+            elif self.path.endswith("chat/completions"):
+                self.send({"id": "stub", "object": "chat.completion", "created": int(time.time()),
+                           "model": request.get("model", "stub"),
+                           "choices": [{"index": 0, "finish_reason": "stop",
+                                        "message": {"role": "assistant", "content": text}}]})
+            elif self.path.startswith("/v1/inference/"):
+                self.send({"results": [{"generated_text": text}]})
+            elif self.path.startswith("/models/"):
+                self.send([{"generated_text": text}])
+            else:
+                self.send(text.encode("utf-8"), "text/plain")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start(port: int = 0, latency: float = 0.3) -> ThreadingHTTPServer:
+    """Stub server running on a background thread; port 0 picks a free one"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def environment(server: ThreadingHTTPServer) -> dict:
+    """QUICKLIST_* variables that send every provider tier to the stub"""
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    env = {
+        "QUICKLIST_GOOGLE_VISION_API_KEY": STUB_KEY,
+        "QUICKLIST_GROQ_BASE_URL": f"{base}/groq",
+    }
+    for provider in ("groq", "deepinfra", "together", "huggingface"):
+        env[f"QUICKLIST_{provider.upper()}_API_KEY"] = STUB_KEY
+    for provider in ("google", "deepinfra", "together", "pollinations", "huggingface"):
+        env[f"QUICKLIST_{provider.upper()}_BASE_URL"] = base
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before every answer")
+    args = parser.parse_args()
+
+    server = start(args.port, args.latency)
+    for name, value in environment(server).items():
+        print(f"export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
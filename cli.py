@@ -0,0 +1,132 @@
+"""Headless QuickList: the listing pipeline without the Streamlit page
+
+One photo, printed as JSON or as ready-to-paste platform text:
+
+    python cli.py photo.jpg --name "grey teddy coat" --price '$45'
+    python cli.py photo.jpg --format etsy
+
+A whole bin, into a resumable JSONL file (finished items are skipped
+when the command is run again):
+
+    python cli.py --manifest bin-042.csv --output bin-042.jsonl
+    python cli.py --folder /srv/intake/bin-042 --output bin-042.jsonl --concurrency 8 --processes 4
+
+Provider keys come from .streamlit/secrets.toml as for the app, or from
+QUICKLIST_<SECTION>_<KEY> environment variables (QUICKLIST_GROQ_API_KEY).
+"""
+import argparse
+import json
+import os
+import sys
+
+FORMATS = ["json", "shopify", "amazon", "etsy", "woocommerce"]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate product listings without the Streamlit page",
+        epilog="Exit status is 1 when any item fails, 2 on bad arguments.",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("image", nargs="?", help="product photo (JPEG or PNG)")
+    source.add_argument("--manifest", help="CSV with an image column and optional name, price, features, "
+                                           "target_audience")
+    source.add_argument("--folder", help="every JPEG / PNG directly inside this folder")
+
+    item = parser.add_argument_group("single photo")
+    item.add_argument("--name", default="", help="product name (detected when omitted)")
+    item.add_argument("--price", default="")
+    item.add_argument("--features", default="")
+    item.add_argument("--audience", default="", help="target audience")
+    item.add_argument("--format", choices=FORMATS, default="json",
+                      help="json (default) or one platform's listing text")
+
+    parser.add_argument("--output", help="write here instead of stdout; required for --manifest / --folder")
+    parser.add_argument("--concurrency", type=int, default=4, help="items in flight at once (batch only)")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="worker processes for image decoding and color analysis (batch only; "
+                             "0 keeps it on the item threads)")
+    parser.add_argument("--combined", action="store_true",
+                        help="one structured LLM call for description and keywords")
+    parser.add_argument("-v", "--verbose", action="store_true", help="progress events on stderr")
+
+    args = parser.parse_args(argv)
+    if (args.manifest or args.folder) and not args.output:
+        parser.error("--output is required with --manifest or --folder")
+    return args
+
+
+def run_single(args: argparse.Namespace, engine) -> int:
+    from PIL import Image
+
+    events = engine.ProgressEvents()
+    if args.verbose:
+        events.subscribe(engine.log_progress)
+
+    pipeline = engine.build_listing_pipeline(args.combined, events=events)
+    with Image.open(args.image) as image:
+        prepared = engine.PreparedImage(image)
+    values, trace = pipeline.run(
+        {
+            "image": prepared,
+            "product_name": args.name.strip(),
+            "features": args.features,
+            "target_audience": args.audience,
+            "price": args.price,
+        },
+        on_stage=events.on_stage
+    )
+    if args.verbose:
+        print(trace.format(), file=sys.stderr)
+
+    if args.format == "json":
+        text = json.dumps(engine.listing_record(values), indent=2, ensure_ascii=False)
+    else:
+        platform = next(name for name in engine.PLATFORMS if name.lower() == args.format)
+        text = values["formatted"][platform]
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def run_batch(args: argparse.Namespace, engine) -> int:
+    items = engine.load_manifest(args.manifest) if args.manifest else engine.load_folder(args.folder)
+
+    def on_update(update):
+        if update.status == "running" and not args.verbose:
+            return
+        detail = f" ({update.detail})" if update.detail else ""
+        print(f"{update.index + 1}/{len(items)} {os.path.basename(items[update.index].source)}: "
+              f"{update.status}{detail}", file=sys.stderr)
+
+    runner = engine.BatchRunner(args.output, args.concurrency, args.combined, args.processes)
+    counts = runner.run(items, on_update=on_update)
+    print(f"{counts['done']} done, {counts['failed']} failed, {counts['skipped']} already finished",
+          file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    # Deferred so --help and argument errors do not pay for the engine's imports
+    import quicklist
+
+    # stdout carries only the result; -v sends engine diagnostics to stderr
+    if args.verbose:
+        quicklist.enable_logging()
+    try:
+        if args.image:
+            return run_single(args, quicklist)
+        return run_batch(args, quicklist)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
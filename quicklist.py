@@ -0,0 +1,4282 @@
+"""QuickList listing engine: image analysis, listing generation and platform formatting
+
+Importable without Streamlit (the page lives in app.py). NumPy, Pillow,
+requests, httpx and asyncio are imported on first use and the provider
+SDKs (groq, boto3) only when their tier builds a client, so the CLI and
+worker processes start fast. Diagnostics go to the "quicklist" logger
+and stay silent until enable_logging() (or the caller's own logging
+setup) turns them on.
+"""
+from __future__ import annotations
+
+import io
+import base64
+from dataclasses import dataclass, field
+from functools import cached_property, wraps
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Dict, NamedTuple, Optional, Tuple, Union
+import time
+import json
+import os
+import re
+import sys
+import hashlib
+import threading
+import queue
+import sqlite3
+import csv
+import dataclasses
+import importlib
+import importlib.util
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from array import array
+from collections import deque
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+# Diagnostics (tier failures, repairs, hedges) stay silent unless the caller opts in
+logger = logging.getLogger("quicklist")
+logger.addHandler(logging.NullHandler())
+
+
+def enable_logging(level: int = logging.INFO, stream=None) -> None:
+    """Write engine diagnostics to stream (stderr by default); safe to call repeatedly"""
+    if not any(getattr(handler, "quicklist_console", False) for handler in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.quicklist_console = True
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+class LazyModule:
+    """Stands in for a module until the first attribute access imports it"""
+    
+    def __init__(self, name: str):
+        self.__module_name = name
+    
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self.__module_name)
+        # Later lookups are plain instance-dict hits
+        self.__dict__.update(vars(module))
+        return getattr(module, attr)
+
+
+np = LazyModule("numpy")
+Image = LazyModule("PIL.Image")
+ImageOps = LazyModule("PIL.ImageOps")
+requests = LazyModule("requests")
+httpx = LazyModule("httpx")
+asyncio = LazyModule("asyncio")
+multiprocessing = LazyModule("multiprocessing")
+
+# Multi-AI fallback configuration (the SDK is imported when the client is built)
+HAS_GROQ = importlib.util.find_spec("groq") is not None
+
+# The *_async API sends through httpx; without it those tiers run on worker threads
+HAS_HTTPX = importlib.util.find_spec("httpx") is not None
+
+# Local on-disk cache (color tables, analysis results)
+CACHE_DIR = os.environ.get("QUICKLIST_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "quicklist"))
+
+# Read when not running under Streamlit; later files override earlier ones, as in Streamlit
+SECRETS_FILES = [
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+    os.path.join(".streamlit", "secrets.toml"),
+]
+SECRETS_ENV_PREFIX = "QUICKLIST_"
+
+_file_secrets = (None, {})
+
+
+def _load_file_secrets() -> Dict:
+    """Merged secrets.toml files, re-read when one of them changes"""
+    global _file_secrets
+    stamps = tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in SECRETS_FILES)
+    if stamps == _file_secrets[0]:
+        return _file_secrets[1]
+    merged = {}
+    for path in SECRETS_FILES:
+        if tomllib is None or not os.path.exists(path):
+            continue
+        try:
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read {path}: {e}")
+            continue
+        for section, values in data.items():
+            if isinstance(values, dict):
+                merged.setdefault(section, {}).update(values)
+            else:
+                merged[section] = values
+    _file_secrets = (stamps, merged)
+    return merged
+
+
+def _env_value(value: str):
+    """Environment override as a TOML-ish scalar: true, 0.2 and 8 keep their types"""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def secrets_section(section: str) -> Dict:
+    """[section] of the secrets, {} when unset
+    
+    st.secrets inside a Streamlit app, the secrets.toml files otherwise;
+    QUICKLIST_<SECTION>_<KEY> environment variables override either.
+    """
+    streamlit = sys.modules.get("streamlit")
+    settings = {}
+    if streamlit is not None:
+        try:
+            settings = dict(streamlit.secrets.get(section, {}))
+        except Exception:
+            pass
+    else:
+        values = _load_file_secrets().get(section, {})
+        settings = dict(values) if isinstance(values, dict) else {}
+    
+    prefix = f"{SECRETS_ENV_PREFIX}{section.upper()}_"
+    for name, value in os.environ.items():
+        if name.startswith(prefix):
+            settings[name[len(prefix):].lower()] = _env_value(value)
+    return settings
+
+
+def get_secret(section: str, key: str, default=None):
+    """secrets[section][key], or default when unset or no secrets file"""
+    return secrets_section(section).get(key, default)
+
+
+# Public endpoints; [<provider>] base_url sends a tier elsewhere (a proxy, or a local stub in tests)
+PROVIDER_BASE_URLS = {
+    "groq": "https://api.groq.com",
+    "google": "https://vision.googleapis.com",
+    "huggingface": "https://api-inference.huggingface.co",
+    "deepinfra": "https://api.deepinfra.com",
+    "together": "https://api.together.xyz",
+    "pollinations": "https://text.pollinations.ai",
+}
+
+
+def provider_url(provider: str, path: str) -> str:
+    base = get_secret(provider, "base_url") or PROVIDER_BASE_URLS[provider]
+    return base.rstrip("/") + path
+
+
+def process_resource(builder: Callable[[], object]) -> Callable[[], object]:
+    """Run a zero-argument builder once per process and share the result
+    
+    Module state outlives Streamlit reruns, so this stands in for
+    st.cache_resource without importing Streamlit.
+    """
+    lock = threading.Lock()
+    built = []
+    
+    @wraps(builder)
+    def get():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(builder())
+        return built[0]
+    return get
+
+
+class memoized_property:
+    """cached_property with a lock per instance and attribute
+    
+    Before Python 3.12 cached_property holds one lock per attribute for
+    every instance, so threads working on different images would queue
+    behind each other. The value lands in the instance __dict__, so later
+    reads skip the descriptor entirely.
+    """
+    
+    def __init__(self, func: Callable[[object], object]):
+        self.func = func
+        self.__doc__ = func.__doc__
+    
+    def __set_name__(self, owner, name: str):
+        self.name = name
+    
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        locks = instance.__dict__.setdefault("_memo_locks", {})
+        with locks.setdefault(self.name, threading.Lock()):
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.func(instance)
+        return instance.__dict__[self.name]
+
+
+# Data classes (UNCHANGED)
+@dataclass
+class ProductAnalysis:
+    category: str
+    materials: List[str]
+    colors: List[str]
+    style: str
+    confidence: float
+    specific_type: str = ""
+    palette: List[Tuple[str, float]] = field(default_factory=list)  # (hex, pixel fraction)
+    provider: str = ""  # tier that produced the analysis
+
+
+@dataclass
+class ProductDescription:
+    title: str
+    description: str
+    bullet_points: List[str]
+    meta_description: str
+
+
+class PreparedImage:
+    """Upload decoded and normalized once, with lazily memoized encodings for every tier"""
+    
+    MAX_SIDE = 1024          # working copy is downscaled to fit this box
+    THUMBNAIL_SIZE = (100, 100)
+    JPEG_QUALITY = 95
+    
+    # What a worker process computes and ships back (see prepare_image_state)
+    SHIPPED = ("jpeg_bytes", "content_hash", "dhash", "thumbnail", "foreground_mask", "dominant_color", "palette")
+    
+    def __init__(self, image: Image.Image):
+        # Respect camera orientation before anything looks at the pixels
+        image = ImageOps.exif_transpose(image)
+        
+        # Flatten alpha / palette images onto white so JPEG encoding never fails
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        
+        working = image.copy()
+        working.thumbnail((self.MAX_SIDE, self.MAX_SIDE), Image.LANCZOS)
+        self.image = working
+    
+    @classmethod
+    def ensure(cls, image: Union[Image.Image, "PreparedImage"]) -> "PreparedImage":
+        """Accept either a raw PIL upload or an already prepared image"""
+        return image if isinstance(image, cls) else cls(image)
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> "PreparedImage":
+        """Rebuild from prepare_image_state output without redoing any of its work"""
+        prepared = cls.__new__(cls)
+        prepared.__dict__.update(state)
+        return prepared
+    
+    @memoized_property
+    def image(self) -> Image.Image:
+        """Working copy; set by __init__, decoded from jpeg_bytes after from_state"""
+        return Image.open(io.BytesIO(self.jpeg_bytes)).convert("RGB")
+    
+    @memoized_property
+    def content_hash(self) -> str:
+        """SHA-256 of the normalized pixels - identical for re-uploads of the same photo"""
+        digest = hashlib.sha256(f"{self.image.size}".encode())
+        digest.update(self.image.tobytes())
+        return digest.hexdigest()
+    
+    @memoized_property
+    def dhash(self) -> int:
+        """64-bit difference hash of the thumbnail - robust to re-framing and re-encoding"""
+        gray = np.asarray(Image.fromarray(self.thumbnail).convert("L").resize((9, 8), Image.BOX), dtype=np.int16)
+        bits = (gray[:, 1:] > gray[:, :-1]).ravel()
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+    
+    @memoized_property
+    def jpeg_bytes(self) -> bytes:
+        buffered = io.BytesIO()
+        self.image.save(buffered, format="JPEG", quality=self.JPEG_QUALITY)
+        return buffered.getvalue()
+    
+    @memoized_property
+    def jpeg_base64(self) -> str:
+        return base64.b64encode(self.jpeg_bytes).decode()
+    
+    @memoized_property
+    def png_bytes(self) -> bytes:
+        buffered = io.BytesIO()
+        self.image.save(buffered, format="PNG")
+        return buffered.getvalue()
+    
+    @memoized_property
+    def thumbnail(self) -> np.ndarray:
+        """100x100 RGB uint8 array used by all local color analysis"""
+        return np.asarray(self.image.resize(self.THUMBNAIL_SIZE), dtype=np.uint8)
+    
+    @memoized_property
+    def foreground_mask(self) -> np.ndarray:
+        """Boolean thumbnail mask with the plain intake backdrop removed"""
+        return QuickListAI.foreground_masks(self.thumbnail)[0]
+    
+    @memoized_property
+    def dominant_color(self) -> str:
+        return QuickListAI._vote_color_name(self.thumbnail[self.foreground_mask])
+    
+    @memoized_property
+    def palette(self) -> List[Tuple[str, float]]:
+        return QuickListAI.extract_palettes(self.thumbnail, 3, self.foreground_mask[np.newaxis])[0]
+
+
+def prepare_image_state(source: Union[str, bytes]) -> Dict:
+    """Decode, normalize, encode and color-analyze one photo (a path or its bytes)
+    
+    Module-level so a process pool can run it; returns plain values for
+    PreparedImage.from_state, with the 100x100 thumbnail instead of the
+    full working copy.
+    """
+    with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as image:
+        prepared = PreparedImage(image)
+    return {name: getattr(prepared, name) for name in PreparedImage.SHIPPED}
+
+
+def image_process_pool(processes: int) -> ProcessPoolExecutor:
+    """Worker processes for prepare_image_state
+    
+    forkserver where the platform has it: forking a process that already
+    runs provider threads can deadlock, and spawn re-imports everything
+    per worker.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    if method == "forkserver":
+        context.set_forkserver_preload([__name__])
+    return ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+
+@process_resource
+def get_io_executor() -> ThreadPoolExecutor:
+    """Shared thread pool for provider calls that run concurrently"""
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="quicklist-io")
+
+
+class HttpPool:
+    """Shared keep-alive HTTP session with per-host connection pools
+    
+    One requests.Session for every provider tier so TCP+TLS connections
+    are reused across tiers, items and sessions. urllib3 keeps a pool per
+    host; pool_maxsize bounds concurrent connections to one host. The
+    session carries no per-caller state, so it is safe to share between
+    threads.
+    """
+    
+    def __init__(self, pool_connections: int = 16, pool_maxsize: int = 32):
+        self.session = requests.Session()
+        self.adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.session.post(url, **kwargs)
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session.get(url, **kwargs)
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Requests, new connections and reused connections per host"""
+        pools = self.adapter.poolmanager.pools
+        stats = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host["requests"] += pool.num_requests
+            host["connections"] += pool.num_connections
+            host["reused"] += max(0, pool.num_requests - pool.num_connections)
+        return stats
+
+
+@process_resource
+def get_http_pool() -> HttpPool:
+    """Process-wide HTTP pool used by every provider tier"""
+    settings = secrets_section("http")
+    return HttpPool(
+        pool_connections=int(settings.get("pool_connections", 16)),
+        pool_maxsize=int(settings.get("pool_maxsize", 32))
+    )
+
+
+_async_http_clients = weakref.WeakKeyDictionary()
+
+
+@process_resource
+def _warn_without_httpx() -> None:
+    logger.warning("httpx is not installed: *_async calls run their provider tiers on worker threads "
+          "(pip install httpx for the async HTTP client)")
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Keep-alive httpx client for the running event loop
+    
+    httpx connections belong to the loop that opened them, so each loop
+    gets its own client, dropped with the loop. [http] async_max_connections
+    bounds requests in flight per loop (default 256).
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        settings = secrets_section("http")
+        client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=int(settings.get("async_max_connections", 256)),
+            max_keepalive_connections=int(settings.get("pool_maxsize", 32))
+        ))
+        _async_http_clients[loop] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    """Close the running loop's client; call before the loop shuts down"""
+    client = _async_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+class ProviderRegistry:
+    """Long-lived provider SDK clients (Groq, boto3 Rekognition)
+    
+    Each client is built once, on first use, and reused by every session
+    and worker thread. Clients are keyed by a fingerprint of the
+    credentials they were built with, so rotating a key in the secrets
+    builds a fresh client on the next call. Construction time is recorded
+    per provider.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._metrics = {}
+    
+    @staticmethod
+    def _fingerprint(credentials: tuple) -> str:
+        return hashlib.sha256(repr(credentials).encode("utf-8")).hexdigest()
+    
+    def get(self, name: str, credentials: tuple, factory: Callable[[], object]):
+        """Client for name built by factory(), rebuilt when credentials change"""
+        fingerprint = self._fingerprint(credentials)
+        entry = self._clients.get(name)
+        if entry is not None and entry[0] == fingerprint:
+            with self._lock:
+                self._metrics[name]["hits"] += 1
+            return entry[1]
+        
+        with self._lock:
+            entry = self._clients.get(name)
+            if entry is not None and entry[0] == fingerprint:
+                self._metrics[name]["hits"] += 1
+                return entry[1]
+            
+            started = time.perf_counter()
+            client = factory()
+            elapsed = time.perf_counter() - started
+            
+            metrics = self._metrics.setdefault(
+                name, {"builds": 0, "hits": 0, "last_build_ms": 0.0, "total_build_ms": 0.0}
+            )
+            metrics["builds"] += 1
+            metrics["last_build_ms"] = elapsed * 1000
+            metrics["total_build_ms"] += elapsed * 1000
+            if entry is not None:
+                logger.info(f"{name} credentials changed, rebuilt client in {elapsed * 1000:.0f} ms")
+            self._clients[name] = (fingerprint, client)
+            return client
+    
+    def invalidate(self, name: str = None) -> None:
+        with self._lock:
+            if name is None:
+                self._clients.clear()
+            else:
+                self._clients.pop(name, None)
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Builds, reuse hits and construction time (ms) per provider"""
+        with self._lock:
+            return {name: dict(metrics) for name, metrics in self._metrics.items()}
+
+
+@process_resource
+def get_provider_registry() -> ProviderRegistry:
+    """Process-wide provider client registry"""
+    return ProviderRegistry()
+
+
+def get_groq_client():
+    """Shared Groq client for the current api_key; None when unconfigured"""
+    if not HAS_GROQ:
+        return None
+    api_key = get_secret("groq", "api_key")
+    if not api_key:
+        return None
+    base_url = get_secret("groq", "base_url")
+    
+    def build():
+        from groq import Groq
+        return Groq(api_key=api_key, base_url=base_url)
+    
+    return get_provider_registry().get("groq", (api_key, base_url), build)
+
+
+def get_rekognition_client():
+    """Shared boto3 Rekognition client for the current AWS keys; None when unconfigured"""
+    aws = secrets_section("aws")
+    aws_key = aws.get("access_key_id")
+    aws_secret = aws.get("secret_access_key")
+    region = aws.get("region", "us-east-1")
+    if not (aws_key and aws_secret):
+        return None
+    
+    def build():
+        import boto3
+        return boto3.client(
+            'rekognition',
+            aws_access_key_id=aws_key,
+            aws_secret_access_key=aws_secret,
+            region_name=region
+        )
+    
+    return get_provider_registry().get("rekognition", (aws_key, aws_secret, region), build)
+
+
+class CircuitBreaker:
+    """Health tracking for one provider tier
+    
+    closed: calls go through; the last `window` outcomes are kept.
+    open: tripped by error rate or slow-call rate over the window; calls
+        are skipped instantly until `cooldown` has passed.
+    half-open: a background probe is in flight; real calls are still
+        skipped. Success closes the breaker, failure reopens it with the
+        cooldown doubled (up to max_cooldown).
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+    
+    def __init__(self, name: str, window: int = 20, min_calls: int = 4, error_threshold: float = 0.5,
+                 slow_seconds: float = 15.0, slow_threshold: float = 0.8,
+                 cooldown: float = 30.0, max_cooldown: float = 300.0):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.slow_seconds = slow_seconds
+        self.slow_threshold = slow_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.outcomes = deque(maxlen=window)
+        self.latencies = {}  # call kind -> recent successful latencies
+        self.calls = 0
+        self.failures = 0
+        self.skipped = 0
+        self.trips = 0
+        self._lock = threading.Lock()
+    
+    def allow(self, probe: Callable[[], object] = None) -> bool:
+        """True when a real call may go to this provider
+        
+        probe runs on the shared executor once the cooldown has passed; it
+        should raise (or return False) when the provider is still down.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            self.skipped += 1
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                if probe is None:
+                    # Nothing to probe with: let this call through as the trial
+                    self.state = self.HALF_OPEN
+                    self.skipped -= 1
+                    return True
+                self.state = self.HALF_OPEN
+                get_io_executor().submit(self._run_probe, probe)
+            return False
+    
+    def _run_probe(self, probe: Callable[[], object]) -> None:
+        started = time.perf_counter()
+        try:
+            ok = probe() is not False
+        except Exception as e:
+            logger.warning(f"{self.name} probe failed: {e}")
+            ok = False
+        self.record(ok, time.perf_counter() - started)
+    
+    def record(self, ok: bool, latency: float, kind: str = "") -> None:
+        """One call's outcome; successful calls of a named kind also join its latency series
+        
+        Probes pass no kind, so they never skew a series.
+        """
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.failures += 1
+            self.outcomes.append((ok, latency))
+            if ok and kind:
+                self.latencies.setdefault(kind, deque(maxlen=self.window)).append(latency)
+            
+            if self.state == self.HALF_OPEN:
+                if ok:
+                    logger.info(f"{self.name} recovered, circuit closed")
+                    self.state = self.CLOSED
+                    self.cooldown = self.base_cooldown
+                    self.outcomes.clear()
+                else:
+                    self._trip(min(self.cooldown * 2, self.max_cooldown))
+                return
+            
+            if self.state == self.CLOSED and len(self.outcomes) >= self.min_calls:
+                errors = sum(1 for success, _ in self.outcomes if not success)
+                slow = sum(1 for _, elapsed in self.outcomes if elapsed >= self.slow_seconds)
+                if (errors / len(self.outcomes) >= self.error_threshold
+                        or slow / len(self.outcomes) >= self.slow_threshold):
+                    self._trip(self.base_cooldown)
+    
+    def _trip(self, cooldown: float) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.cooldown = cooldown
+        self.trips += 1
+        logger.warning(f"{self.name} circuit open for {cooldown:.0f}s")
+    
+    def latency_quantile(self, q: float, kind: str = "") -> Optional[float]:
+        """Latency quantile (seconds) of recent successful calls, of one kind when given"""
+        with self._lock:
+            if kind:
+                latencies = sorted(self.latencies.get(kind, ()))
+            else:
+                latencies = sorted(elapsed for ok, elapsed in self.outcomes if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            recent = len(self.outcomes)
+            errors = sum(1 for ok, _ in self.outcomes if not ok)
+            stats = {
+                "state": self.state,
+                "calls": self.calls,
+                "failures": self.failures,
+                "skipped": self.skipped,
+                "trips": self.trips,
+                "error_rate": errors / recent if recent else 0.0,
+            }
+        stats["p50_seconds"] = self.latency_quantile(0.5)
+        stats["p90_seconds"] = self.latency_quantile(0.9)
+        return stats
+
+
+@process_resource
+def _get_circuit_breakers() -> Dict[str, CircuitBreaker]:
+    # Breakers are created on first use; the dict itself is shared process-wide
+    return {}
+
+
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Shared circuit breaker for a provider tier, tuned by [breaker] secrets"""
+    breakers = _get_circuit_breakers()
+    breaker = breakers.get(name)
+    if breaker is None:
+        with _breaker_lock:
+            breaker = breakers.get(name)
+            if breaker is None:
+                settings = secrets_section("breaker")
+                breaker = CircuitBreaker(
+                    name,
+                    window=int(settings.get("window", 20)),
+                    min_calls=int(settings.get("min_calls", 4)),
+                    error_threshold=float(settings.get("error_threshold", 0.5)),
+                    slow_seconds=float(settings.get("slow_seconds", 15.0)),
+                    slow_threshold=float(settings.get("slow_threshold", 0.8)),
+                    cooldown=float(settings.get("cooldown_seconds", 30.0)),
+                    max_cooldown=float(settings.get("max_cooldown_seconds", 300.0))
+                )
+                breakers[name] = breaker
+    return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict]:
+    """Health snapshot of every provider tier seen so far"""
+    return {name: breaker.stats() for name, breaker in list(_get_circuit_breakers().items())}
+
+
+class HedgeStats:
+    """Hedge budget and outcome counters for listing generation
+    
+    A hedge is allowed while hedges stay within `budget` (a fraction of
+    hedging-enabled requests) plus one request of burst, so a slow primary
+    can never double spend.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+        self.wins = {}
+    
+    def start_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+    
+    def try_hedge(self, budget: float) -> bool:
+        with self._lock:
+            if self.hedges < budget * self.requests + 1:
+                self.hedges += 1
+                return True
+            self.denied += 1
+            return False
+    
+    def record_win(self, provider: str, by_hedge: bool) -> None:
+        with self._lock:
+            self.wins[provider] = self.wins.get(provider, 0) + 1
+            if by_hedge:
+                self.hedge_wins += 1
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_rate": self.hedges / self.requests if self.requests else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "budget_denied": self.denied,
+                "wins": dict(self.wins),
+            }
+
+
+@process_resource
+def get_hedge_stats() -> HedgeStats:
+    """Process-wide hedging counters"""
+    return HedgeStats()
+
+
+class StreamStats:
+    """Time to first useful text (title or description) of streamed listings"""
+    
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.window = window
+    
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {provider: sorted(samples) for provider, samples in self.samples.items()}
+        return {
+            provider: {
+                "items": len(samples),
+                "p50_seconds": samples[len(samples) // 2],
+                "p90_seconds": samples[min(len(samples) - 1, int(0.9 * len(samples)))],
+            }
+            for provider, samples in snapshot.items() if samples
+        }
+
+
+@process_resource
+def get_stream_stats() -> StreamStats:
+    """Process-wide streaming latency counters"""
+    return StreamStats()
+
+
+class ValidationStats:
+    """Color validation outcomes per LLM tier
+    
+    rejected_seconds is the provider time thrown away on responses that
+    could not be repaired, i.e. what the hallucination check costs.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+    
+    def record(self, provider: str, outcome: str, seconds: float = 0.0) -> None:
+        """outcome is 'clean', 'repaired' or 'rejected'"""
+        with self._lock:
+            row = self.counts.setdefault(
+                provider, {"checked": 0, "clean": 0, "repaired": 0, "rejected": 0, "rejected_seconds": 0.0})
+            row["checked"] += 1
+            row[outcome] += 1
+            row["rejected_seconds"] += seconds
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {provider: dict(row) for provider, row in self.counts.items()}
+        for row in snapshot.values():
+            row["flag_rate"] = (row["repaired"] + row["rejected"]) / row["checked"]
+            row["rejection_rate"] = row["rejected"] / row["checked"]
+        return snapshot
+
+
+@process_resource
+def get_validation_stats() -> ValidationStats:
+    """Process-wide color validation counters"""
+    return ValidationStats()
+
+
+class JsonExtraction(NamedTuple):
+    value: Dict
+    repairs: Tuple[str, ...]
+    complete: bool  # False when truncation repair had to close the object
+
+
+class JsonExtractor:
+    """Incremental, tolerant extraction of the JSON object in LLM output
+    
+    feed() text as it arrives. The first top-level object that needs no
+    repairs and has all of keys is returned as soon as its closing brace
+    is seen; anything after it is ignored. Other objects are kept as
+    candidates, and finish() picks the one with the most of keys, then
+    the fewest repairs, then the earliest (so a {placeholder} in leading
+    prose loses to the listing after it). snapshot() gives a best-effort
+    view mid-stream, and finish() closes a truncated object. Repairs are
+    reported by name:
+    
+        leading_text, trailing_text   prose or code fences around the object
+        smart_quotes, single_quotes   curly or ' quotes as string delimiters
+        unescaped_quote               bare " inside a string
+        control_chars                 raw newlines / tabs inside a string
+        invalid_escape                escapes JSON does not define
+        trailing_comma                , before } or ] (or doubled)
+        missing_comma, missing_colon  absent separators
+        missing_value                 key with no value
+        unquoted_key, unquoted_string bare words where strings belong
+        python_literal                True / False / None
+        mismatched_bracket            ] closing an object or } an array
+        stray_text                    characters outside any token
+        truncated                     input ended inside the object
+    """
+    
+    KEY, COLON, VALUE, AFTER = range(4)
+    QUOTES = {'"': "", "“": "smart_quotes", "”": "smart_quotes", "'": "single_quotes"}
+    CLOSERS = {'"': '"', "“": '”"', "”": '”"', "'": "'"}
+    RUNS = {
+        '"': re.compile(r'[^"\\\x00-\x1f]+'),
+        "“": re.compile(r'[^"”\\\x00-\x1f]+'),
+        "”": re.compile(r'[^"”\\\x00-\x1f]+'),
+        "'": re.compile(r"[^'\"\\\x00-\x1f]+"),
+    }
+    LITERAL = re.compile(r"[A-Za-z0-9_.+\-]+")
+    LITERAL_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.+-")
+    WHITESPACE = re.compile(r"[ \t\r\n]+")
+    NUMBER = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?")
+    HEX4 = re.compile(r"[0-9a-fA-F]{4}")
+    PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null", "NaN": "null", "undefined": "null"}
+    # A quote that starts the next key ("a": "b" "c": ...) ends the string before it
+    NEXT_KEY = re.compile(r'["“”\'][^"“”\'\\\n]*["“”\'][ \t]*:')
+    NEXT_KEY_PREFIX = re.compile(r'["“”\'][^"“”\'\\\n]*(?:["“”\'][ \t]*)?')
+    POSITIONAL = ("leading_text", "trailing_text")  # not counted against a candidate
+    
+    def __init__(self, keys: Tuple[str, ...] = ()):
+        self.keys = keys
+        self._buf = ""
+        self._final = False
+        self._candidates = []  # (value, repairs, complete, end) of objects that needed repairs
+        self._reset(0)
+    
+    def _reset(self, position: int) -> None:
+        self._pos = position
+        self._out = []
+        self._out_len = 0
+        self._stack = []  # [kind, expect, mark] per open container
+        self._string = None  # (opener, role) while inside a string
+        self._literal = ""
+        self._pending_comma = False
+        self._repairs = []
+        self._start = -1
+        self._result = None
+    
+    # -- public API ---------------------------------------------------------
+    
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """Consume more text; returns the object once it is complete"""
+        self._buf += chunk
+        if self._result is None:
+            self._scan()
+        elif chunk.strip():
+            self._note("trailing_text")
+        return self._result
+    
+    def snapshot(self) -> Optional[Dict]:
+        """The object as far as it has been read, closed off; None before it starts"""
+        if self._result is not None:
+            return self._result
+        partial = None
+        if self._stack:
+            try:
+                partial = json.loads(self._closed_text())
+            except ValueError:
+                pass
+        if self._candidates:
+            best = self._best().value
+            if partial is None or self._score(best) >= self._score(partial):
+                return best
+        return partial
+    
+    def finish(self) -> JsonExtraction:
+        """End of input: the first object, repaired; ValueError when there is none"""
+        self._final = True
+        while True:
+            if self._result is None:
+                self._scan()
+            if self._result is not None:
+                if self._buf[self._pos:].strip():
+                    self._note("trailing_text")
+                return JsonExtraction(self._result, tuple(self._repairs), True)
+            
+            if not self._stack:
+                if self._candidates:
+                    return self._best()
+                raise ValueError("No JSON object found")
+            if self._literal:
+                # Keep a final token only if it is whole ("tr" of true is not)
+                token = self._literal
+                if token in ("true", "false", "null") or token in self.PYTHON_LITERALS or self.NUMBER.fullmatch(token):
+                    self._flush_literal()
+                else:
+                    self._literal = ""
+            try:
+                value = json.loads(self._closed_text())
+            except ValueError:
+                self._reset(self._start + 1)
+                continue
+            self._note("truncated")
+            self._candidates.append((value, tuple(self._repairs), False, len(self._buf)))
+            return self._best()
+    
+    # -- candidates ---------------------------------------------------------
+    
+    def _score(self, value: Dict) -> int:
+        return sum(key in value for key in self.keys)
+    
+    def _rank(self, value: Dict, repairs: Tuple[str, ...]) -> tuple:
+        """Sort key: most of keys first, then fewest repairs"""
+        return -self._score(value), sum(repair not in self.POSITIONAL for repair in repairs)
+    
+    def _best(self) -> JsonExtraction:
+        value, repairs, complete, end = min(self._candidates, key=lambda candidate: self._rank(*candidate[:2]))
+        if self._buf[end:].strip() and "trailing_text" not in repairs:
+            repairs += ("trailing_text",)
+        return JsonExtraction(value, repairs, complete)
+    
+    # -- scanner ------------------------------------------------------------
+    
+    def _note(self, repair: str) -> None:
+        if repair not in self._repairs:
+            self._repairs.append(repair)
+    
+    def _emit(self, text: str) -> None:
+        self._out.append(text)
+        self._out_len += len(text)
+    
+    def _scan(self) -> None:
+        buf = self._buf
+        while self._pos < len(buf) and self._result is None:
+            if self._string is not None:
+                if not self._scan_string():
+                    return  # need more input to decide
+                continue
+            
+            if not self._stack:
+                start = buf.find("{", self._pos)
+                if start == -1:
+                    self._pos = len(buf)
+                    return
+                if buf[:start].strip():
+                    self._note("leading_text")
+                self._start = start
+                self._pos = start + 1
+                self._emit("{")
+                self._stack.append(["{", self.KEY, 1])
+                continue
+            
+            char = buf[self._pos]
+            if char in self.LITERAL_CHARS:
+                end = self.LITERAL.match(buf, self._pos).end()
+                self._literal += buf[self._pos:end]
+                self._pos = end
+                if end == len(buf) and not self._final:
+                    return  # the token may continue in the next chunk
+                self._flush_literal()
+                continue
+            if self._literal:
+                self._flush_literal()
+            
+            if char in " \t\r\n":
+                self._pos = self.WHITESPACE.match(buf, self._pos).end()
+                continue
+            self._pos += 1
+            if char in self.QUOTES:
+                role = self._token_start()
+                if self.QUOTES[char]:
+                    self._note(self.QUOTES[char])
+                self._emit('"')
+                self._string = (char, role)
+            elif char in "{[":
+                if self._token_start() == "key":
+                    # Not an object after all (prose with a brace): try the next one
+                    self._reset(self._start + 1)
+                    continue
+                self._emit(char)
+                self._stack.append([char, self.KEY if char == "{" else self.VALUE, self._out_len])
+            elif char in "}]":
+                self._close(char)
+            elif char == ":":
+                frame = self._stack[-1]
+                if frame[1] == self.COLON:
+                    self._emit(":")
+                    frame[1] = self.VALUE
+                else:
+                    self._note("stray_text")
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame[0] == "{" and frame[1] in (self.COLON, self.VALUE):
+                    self._note("missing_value")
+                    self._emit(":null" if frame[1] == self.COLON else "null")
+                    frame[1] = self.AFTER
+                if frame[1] == self.AFTER:
+                    self._pending_comma = True
+                    frame[1] = self.KEY if frame[0] == "{" else self.VALUE
+                else:
+                    self._note("trailing_comma")
+            else:
+                self._note("stray_text")
+    
+    def _scan_string(self) -> bool:
+        opener, role = self._string
+        buf = self._buf
+        match = self.RUNS[opener].match(buf, self._pos)
+        if match:
+            self._emit(match.group())
+            self._pos = match.end()
+        if self._pos >= len(buf):
+            return False
+        
+        position = self._pos
+        char = buf[position]
+        if char == "\\":
+            if position + 1 >= len(buf):
+                return self._final and self._skip(1)
+            escaped = buf[position + 1]
+            if escaped == "u":
+                digits = buf[position + 2:position + 6]
+                if len(digits) < 4 and position + 2 + len(digits) == len(buf):
+                    # Cut off mid-escape: wait for the rest, or drop it at the end
+                    return self._final and self._skip(len(buf) - position)
+                if self.HEX4.fullmatch(digits):
+                    self._emit(buf[position:position + 6])
+                    self._pos += 6
+                    return True
+                self._note("invalid_escape")
+                self._emit("\\\\")
+                self._pos += 1
+            elif escaped in '"\\/bfnrt':
+                self._emit(buf[position:position + 2])
+                self._pos += 2
+            else:
+                self._note("invalid_escape")
+                self._emit(json.dumps(escaped)[1:-1])
+                self._pos += 2
+            return True
+        
+        if char in self.CLOSERS[opener]:
+            # A real closing quote is followed by structure (or a line break)
+            after = position + 1
+            while after < len(buf) and buf[after] in " \t\r\n":
+                after += 1
+            if after == len(buf) and not self._final:
+                return False
+            following = buf[after] if after < len(buf) else ""
+            if following in self.QUOTES and not self._final and \
+                    self.NEXT_KEY_PREFIX.fullmatch(buf, after) and not self.NEXT_KEY.match(buf, after):
+                return False  # could still turn out to be the next key
+            if following == "" or following in ":,}]" or "\n" in buf[position + 1:after] or \
+                    (following in self.QUOTES and self.NEXT_KEY.match(buf, after)):
+                self._emit('"')
+                self._pos += 1
+                self._string = None
+                self._token_end(role)
+                return True
+            self._note("unescaped_quote")
+        elif char < " ":
+            self._note("control_chars")
+        self._emit(json.dumps(char)[1:-1])
+        self._pos += 1
+        return True
+    
+    def _skip(self, count: int) -> bool:
+        self._pos += count
+        return True
+    
+    def _token_start(self) -> str:
+        """Separators before a key or value; returns which one it is"""
+        frame = self._stack[-1]
+        if frame[1] == self.AFTER:
+            self._note("missing_comma")
+            self._pending_comma = True
+            frame[1] = self.KEY if frame[0] == "{" else self.VALUE
+        if frame[1] == self.COLON:
+            self._note("missing_colon")
+            self._emit(":")
+            frame[1] = self.VALUE
+        if frame[1] == self.KEY or frame[0] == "[":
+            frame[2] = self._out_len
+            if self._pending_comma:
+                self._emit(",")
+                self._pending_comma = False
+        return "key" if frame[1] == self.KEY else "value"
+    
+    def _token_end(self, role: str) -> None:
+        self._stack[-1][1] = self.COLON if role == "key" else self.AFTER
+    
+    def _flush_literal(self) -> None:
+        token, self._literal = self._literal, ""
+        role = self._token_start()
+        if role == "key":
+            self._note("unquoted_key")
+            self._emit(json.dumps(token))
+        elif token in ("true", "false", "null") or self.NUMBER.fullmatch(token):
+            self._emit(token)
+        elif token in self.PYTHON_LITERALS:
+            self._note("python_literal")
+            self._emit(self.PYTHON_LITERALS[token])
+        else:
+            self._note("unquoted_string")
+            self._emit(json.dumps(token))
+        self._token_end(role)
+    
+    def _close(self, char: str) -> None:
+        if self._pending_comma:
+            self._note("trailing_comma")
+            self._pending_comma = False
+        wanted = "{" if char == "}" else "["
+        if self._stack[-1][0] != wanted:
+            if not any(frame[0] == wanted for frame in self._stack):
+                self._note("stray_text")
+                return
+            self._note("mismatched_bracket")
+            while self._stack[-1][0] != wanted:
+                self._close_frame()
+        self._close_frame()
+    
+    def _close_frame(self) -> None:
+        kind, expect, _ = self._stack.pop()
+        if kind == "{" and expect in (self.COLON, self.VALUE):
+            self._note("missing_value")
+            self._emit(":null" if expect == self.COLON else "null")
+        self._emit("}" if kind == "{" else "]")
+        if self._stack:
+            self._stack[-1][1] = self.AFTER
+            return
+        
+        if "unquoted_key" in self._repairs and "missing_value" in self._repairs:
+            # A bare {word} is a placeholder in prose, not the object we want
+            self._reset(self._start + 1)
+            return
+        try:
+            value = json.loads("".join(self._out))
+        except ValueError:
+            # Not recoverable after all: look for the next object instead
+            self._reset(self._start + 1)
+            return
+        repairs = tuple(self._repairs)
+        if self._rank(value, repairs) == (-len(self.keys), 0):
+            self._result = value
+            return
+        # Usable, but a later object may be cleaner or closer to what was asked for
+        self._candidates.append((value, repairs, True, self._pos))
+        self._reset(self._pos)
+    
+    def _closed_text(self) -> str:
+        """Output so far with the open string, dangling key and containers closed"""
+        text = "".join(self._out)
+        frames = [list(frame) for frame in self._stack]
+        top = frames[-1]
+        cut = None
+        suffix = ""
+        if self._string is not None:
+            if self._string[1] == "key":
+                cut = top[2]
+            else:
+                suffix = '"'
+                top[1] = self.AFTER
+        elif top[0] == "{" and top[1] in (self.COLON, self.VALUE):
+            cut = top[2]
+        if cut is not None:
+            text = text[:cut]
+        for kind, _, _ in reversed(frames):
+            suffix += "}" if kind == "{" else "]"
+        return text + suffix
+
+
+_json_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str, keys: Tuple[str, ...] = ()) -> JsonExtraction:
+    """The JSON object in text, repaired; ValueError when there is none
+    
+    Picks like JsonExtractor: most of keys, then fewest repairs, then earliest.
+    """
+    # Well-formed objects (the common case) go straight through the C decoder
+    extractor = JsonExtractor(keys)
+    clean = None
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, end = _json_decoder.raw_decode(text, start)
+        except ValueError:
+            start = text.find("{", start + 1)
+            continue
+        if clean is None or extractor._score(value) > extractor._score(clean[0]):
+            repairs = ("leading_text",) if text[:start].strip() else ()
+            if text[end:].strip():
+                repairs += ("trailing_text",)
+            clean = (value, repairs)
+            if extractor._score(value) == len(keys):
+                return JsonExtraction(value, repairs, True)
+        start = text.find("{", end)
+    
+    extractor.feed(text)
+    try:
+        repaired = extractor.finish()
+    except ValueError:
+        if clean is None:
+            raise
+        return JsonExtraction(*clean, True)
+    if clean is not None and extractor._rank(*clean) <= extractor._rank(repaired.value, repaired.repairs):
+        return JsonExtraction(*clean, True)
+    return repaired
+
+
+# Keys that tell a listing apart from other objects in the same response
+LISTING_KEYS = ("title", "description")
+
+
+def partial_listing_fields(extractor: JsonExtractor) -> Dict:
+    """title / description / bullet_points readable so far in a streamed listing"""
+    snapshot = extractor.snapshot() or {}
+    fields = {}
+    for name in LISTING_KEYS:
+        if isinstance(snapshot.get(name), str):
+            fields[name] = snapshot[name]
+    if isinstance(snapshot.get("bullet_points"), list):
+        fields["bullet_points"] = [point for point in snapshot["bullet_points"] if isinstance(point, str)]
+    return fields
+
+
+class ListingStream:
+    """Routes streamed completion text to an on_partial(fields) callback
+    
+    Only one tier owns the display at a time: the first to produce text.
+    If it fails, the next tier to stream takes over. Callbacks run on the
+    provider's worker thread, so UIs should hand them to their own thread.
+    """
+    
+    def __init__(self, on_partial: Callable[[Dict], None]):
+        self.on_partial = on_partial
+        self.owner = None
+        self.started = time.perf_counter()
+        self.first_text_seconds = None
+        self._lock = threading.Lock()
+    
+    def writer(self, provider: str) -> Callable[[str], None]:
+        extractor = JsonExtractor(LISTING_KEYS)
+        consumed = [0]
+        
+        def write(text: str) -> None:
+            # text is the whole response so far; only the new part is parsed
+            extractor.feed(text[consumed[0]:])
+            consumed[0] = len(text)
+            with self._lock:
+                if self.owner is None:
+                    self.owner = provider
+                if self.owner != provider:
+                    return
+            fields = partial_listing_fields(extractor)
+            if not (fields.get("title") or fields.get("description")):
+                return
+            if self.first_text_seconds is None:
+                self.first_text_seconds = time.perf_counter() - self.started
+                get_stream_stats().record(provider, self.first_text_seconds)
+            fields["provider"] = provider
+            self.on_partial(fields)
+        return write
+    
+    def release(self, provider: str) -> None:
+        with self._lock:
+            if self.owner == provider:
+                self.owner = None
+
+
+class ProgressEvent(NamedTuple):
+    kind: str
+    stage: str
+    provider: str = ""
+    detail: str = ""
+    elapsed: float = 0.0  # seconds since the run started
+    
+    def describe(self) -> str:
+        """One-line human-readable form, shared by the UI status line and logs"""
+        label = QuickListAI.LLM_LABELS.get(self.provider, self.provider)
+        text = {
+            "started": f"Running {self.stage}",
+            "done": f"{self.stage} done",
+            "failed": f"{self.stage} failed",
+            "provider_attempted": f"{self.stage}: trying {label}",
+            "provider_failed": f"{self.stage}: {label} failed",
+            "provider_skipped": f"{self.stage}: {label} unavailable",
+            "validated": f"{self.stage}: {label} answer accepted",
+        }.get(self.kind, f"{self.stage}: {self.kind}")
+        return f"{text} ({self.detail})" if self.detail else text
+
+
+class ProgressEvents:
+    """Observer hub for the progress of one listing run
+    
+    Pipeline stages publish started / done / failed (through on_stage) and
+    LLM tiers publish provider_attempted / provider_failed /
+    provider_skipped / validated. Subscribers are called on the publishing
+    thread, which for provider events is a worker, so UIs should queue
+    events for their own thread.
+    """
+    
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self._subscribers = []
+        self._lock = threading.Lock()
+    
+    def subscribe(self, callback: Callable[[ProgressEvent], None]) -> Callable[[], None]:
+        """Add a subscriber; returns a function that removes it again"""
+        with self._lock:
+            self._subscribers.append(callback)
+        
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+    
+    def publish(self, kind: str, stage: str, provider: str = "", detail: str = "") -> None:
+        event = ProgressEvent(kind, stage, provider, detail, time.perf_counter() - self.origin)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Progress subscriber failed: {e}")
+    
+    def on_stage(self, event: str, name: str, timing: Optional["StageTiming"], values: Dict) -> None:
+        """Pipeline.run on_stage adapter"""
+        self.publish(event, name, detail=timing.error if timing else "")
+
+
+def log_progress(event: ProgressEvent) -> None:
+    """Subscriber that writes events to the engine log (see enable_logging)"""
+    logger.info(f"[{event.elapsed:7.2f}s] {event.describe()}")
+
+
+@process_resource
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Thread pool for pipeline stages (kept apart from provider calls so
+    stages waiting on provider futures can never starve them)"""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="quicklist-stage")
+
+
+class Stage(NamedTuple):
+    """One pipeline step: func(*inputs) -> outputs (a tuple when several)"""
+    name: str
+    func: Callable
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+
+
+class StageTiming(NamedTuple):
+    name: str
+    started: float  # seconds since the pipeline started
+    finished: float
+    thread: str
+    error: str = ""
+    
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
+
+
+class PipelineTrace:
+    """Per-stage timings of one run and the critical path through them"""
+    
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        self.producers = {output: stage.name for stage in stages for output in stage.outputs}
+        self.timings: Dict[str, StageTiming] = {}
+    
+    @property
+    def total_seconds(self) -> float:
+        return max((timing.finished for timing in self.timings.values()), default=0.0)
+    
+    def critical_path(self) -> List[str]:
+        """Stages on the longest dependency chain, first to last
+        
+        Walks back from the stage that finished last, each time to the
+        input producer that finished last (the one it actually waited on).
+        """
+        if not self.timings:
+            return []
+        current = max(self.timings.values(), key=lambda timing: timing.finished).name
+        path = [current]
+        while True:
+            upstream = [self.producers[name] for name in self.stages[current].inputs
+                        if name in self.producers and self.producers[name] in self.timings]
+            if not upstream:
+                break
+            current = max(upstream, key=lambda name: self.timings[name].finished)
+            path.append(current)
+        return path[::-1]
+    
+    def format(self) -> str:
+        critical = set(self.critical_path())
+        lines = []
+        for timing in sorted(self.timings.values(), key=lambda timing: timing.started):
+            marker = "*" if timing.name in critical else " "
+            status = f"  FAILED: {timing.error}" if timing.error else ""
+            lines.append(f"{marker} {timing.name:<18} {timing.started * 1000:8.0f} ms -> "
+                         f"{timing.finished * 1000:8.0f} ms  ({timing.seconds * 1000:.0f} ms){status}")
+        lines.append(f"  total {self.total_seconds * 1000:.0f} ms (* = critical path)")
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """Small dependency-graph executor
+    
+    Each stage starts as soon as all of its inputs exist, so independent
+    stages overlap on the worker pool. Scheduling and on_stage callbacks
+    happen on the calling thread, which makes it safe to update Streamlit
+    from the callback. A failing stage cancels whatever has not started
+    and re-raises its exception.
+    """
+    
+    def __init__(self, stages: List[Stage]):
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Duplicate stage names")
+        outputs = [output for stage in stages for output in stage.outputs]
+        if len(set(outputs)) != len(outputs):
+            raise ValueError("Each output must be produced by exactly one stage")
+        self.stages = stages
+    
+    def run(self, inputs: Dict, executor: ThreadPoolExecutor = None,
+            on_stage: Callable[[str, str, Optional[StageTiming], Dict], None] = None,
+            on_idle: Callable[[], None] = None, poll_interval: float = 0.1) -> Tuple[Dict, PipelineTrace]:
+        """Run every stage; returns (all values by name, trace)
+        
+        on_stage(event, stage_name, timing, values) is called with "started"
+        (timing None), "done" or "failed"; values holds everything produced
+        so far. on_idle() is called at least every poll_interval seconds
+        while stages run, for draining updates posted by worker threads.
+        """
+        executor = executor or get_stage_executor()
+        values = dict(inputs)
+        trace = PipelineTrace(self.stages)
+        waiting = list(self.stages)
+        running = {}
+        origin = time.perf_counter()
+        
+        def call(stage: Stage):
+            started = time.perf_counter() - origin
+            try:
+                result = stage.func(*(values[name] for name in stage.inputs))
+                error = None
+            except Exception as e:
+                result, error = None, e
+            timing = StageTiming(stage.name, started, time.perf_counter() - origin,
+                                 threading.current_thread().name, repr(error) if error else "")
+            return result, error, timing
+        
+        while waiting or running:
+            ready = [stage for stage in waiting if all(name in values for name in stage.inputs)]
+            for stage in ready:
+                waiting.remove(stage)
+                running[executor.submit(call, stage)] = stage
+                if on_stage:
+                    on_stage("started", stage.name, None, values)
+            
+            if not running:
+                missing = sorted({name for stage in waiting for name in stage.inputs if name not in values})
+                raise ValueError(f"Pipeline inputs never produced: {', '.join(missing)}")
+            
+            done, _ = wait(list(running), timeout=poll_interval if on_idle else None,
+                           return_when=FIRST_COMPLETED)
+            if on_idle:
+                on_idle()
+            for future in done:
+                stage = running.pop(future)
+                result, error, timing = future.result()
+                trace.timings[stage.name] = timing
+                if error is not None:
+                    if on_stage:
+                        on_stage("failed", stage.name, timing, values)
+                    for other in running:
+                        other.cancel()
+                    raise error
+                
+                if len(stage.outputs) == 1:
+                    values[stage.outputs[0]] = result
+                else:
+                    values.update(zip(stage.outputs, result))
+                if on_stage:
+                    on_stage("done", stage.name, timing, values)
+        
+        return values, trace
+
+
+# Bump when analysis logic changes so stale results are dropped
+# (the taxonomy version is part of every key, so vocabulary edits need no bump)
+ANALYSIS_CACHE_VERSION = "3"
+
+
+class AnalysisCache:
+    """Content-addressed SQLite cache of ProductAnalysis results
+    
+    Keyed by the normalized image hash plus product name. Entries expire
+    after ttl_seconds, the least recently used ones are evicted past
+    max_entries, and rows written under another version are purged.
+    """
+    
+    def __init__(self, path: str, max_entries: int = 20000, ttl_seconds: float = 30 * 24 * 3600,
+                 version: str = ANALYSIS_CACHE_VERSION):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analysis_accessed ON analysis(accessed_at)")
+            self._conn.execute("DELETE FROM analysis WHERE version != ?", (version,))
+    
+    @staticmethod
+    def make_key(prepared: PreparedImage, product_name: str, taxonomy_version: str = "") -> str:
+        name = " ".join(product_name.lower().split())
+        return hashlib.sha256(f"{prepared.content_hash}|{name}|{taxonomy_version}".encode()).hexdigest()
+    
+    def get(self, key: str):
+        """Cached ProductAnalysis for key, or None"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM analysis WHERE key = ? AND version = ?",
+                (key, self.version)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM analysis WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE analysis SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        
+        data = json.loads(row[0])
+        data["palette"] = [tuple(entry) for entry in data.get("palette", [])]
+        return ProductAnalysis(**data)
+    
+    def put(self, key: str, analysis: "ProductAnalysis") -> None:
+        now = time.time()
+        payload = json.dumps(dataclasses.asdict(analysis))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis (key, version, payload, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, self.version, payload, now, now)
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM analysis").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM analysis WHERE key IN (SELECT key FROM analysis ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+    
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analysis")
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+@process_resource
+def get_analysis_cache() -> AnalysisCache:
+    """Process-wide analysis cache (survives Streamlit reruns and sessions)"""
+    settings = secrets_section("cache")
+    return AnalysisCache(
+        os.path.join(CACHE_DIR, "analysis.sqlite3"),
+        max_entries=int(settings.get("max_entries", 20000)),
+        ttl_seconds=float(settings.get("ttl_days", 30)) * 24 * 3600
+    )
+
+
+class ListingIndex:
+    """Near-duplicate lookup of past listings by perceptual hash
+    
+    Multi-index hashing: each 64-bit dHash is split into four 16-bit
+    chunks with one in-memory table per chunk. Two hashes within Hamming
+    distance d share at least one chunk within d // 4 bits, so a lookup
+    only probes those neighbouring buckets. Listings persist in SQLite
+    and the tables are rebuilt from it on open.
+    """
+    
+    CHUNKS = 4
+    CHUNK_BITS = 16
+    MAX_THRESHOLD = 11  # chunk radius 2 -> 137 probes per table
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids = array("q")
+        self._hashes = array("Q")
+        self._tables = [{} for _ in range(self.CHUNKS)]
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS listings ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, phash INTEGER NOT NULL, content_hash TEXT, "
+                "product_name TEXT, analysis TEXT, description TEXT, keywords TEXT, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS listings_content_hash ON listings (content_hash)")
+            for row_id, phash in self._conn.execute("SELECT id, phash FROM listings ORDER BY id"):
+                self._insert(row_id, phash & 0xFFFFFFFFFFFFFFFF)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def _chunks(self, phash: int) -> List[int]:
+        mask = (1 << self.CHUNK_BITS) - 1
+        return [(phash >> (i * self.CHUNK_BITS)) & mask for i in range(self.CHUNKS)]
+    
+    def _insert(self, row_id: int, phash: int) -> None:
+        slot = len(self._ids)
+        self._ids.append(row_id)
+        self._hashes.append(phash)
+        for table, chunk in zip(self._tables, self._chunks(phash)):
+            bucket = table.get(chunk)
+            if bucket is None:
+                table[chunk] = array("l", [slot])
+            else:
+                bucket.append(slot)
+    
+    def _neighbours(self, chunk: int, radius: int) -> List[int]:
+        values = [chunk]
+        if radius >= 1:
+            flips = [chunk ^ (1 << i) for i in range(self.CHUNK_BITS)]
+            values.extend(flips)
+            if radius >= 2:
+                values.extend(chunk ^ (1 << i) ^ (1 << j)
+                              for i in range(self.CHUNK_BITS) for j in range(i + 1, self.CHUNK_BITS))
+        return values
+    
+    def add(self, phash: int, content_hash: str, product_name: str, analysis: "ProductAnalysis",
+            description: "ProductDescription", keywords: Dict[str, List[str]]) -> int:
+        """Remember a finished listing; returns its row id
+        
+        The same photo (content_hash) approved again replaces its earlier
+        listing instead of adding a second row.
+        """
+        signed = phash - (1 << 64) if phash >= 1 << 63 else phash  # SQLite integers are signed
+        fields = (product_name, json.dumps(dataclasses.asdict(analysis)), json.dumps(dataclasses.asdict(description)),
+                  json.dumps(keywords), time.time())
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM listings WHERE content_hash = ?", (content_hash,)).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE listings SET product_name = ?, analysis = ?, description = ?, keywords = ?, created_at = ? "
+                    "WHERE id = ?", fields + (row[0],)
+                )
+                return row[0]
+            cursor = self._conn.execute(
+                "INSERT INTO listings (phash, content_hash, product_name, analysis, description, keywords, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (signed, content_hash) + fields
+            )
+            self._insert(cursor.lastrowid, phash)
+            return cursor.lastrowid
+    
+    def nearest(self, phash: int, threshold: int = 6, limit: int = 5) -> List[Tuple[int, int]]:
+        """(distance, row id) of stored listings within threshold bits, closest first"""
+        threshold = min(threshold, self.MAX_THRESHOLD)
+        radius = threshold // self.CHUNKS
+        seen = set()
+        matches = []
+        with self._lock:
+            for table, chunk in zip(self._tables, self._chunks(phash)):
+                for value in self._neighbours(chunk, radius):
+                    for slot in table.get(value, ()):
+                        if slot in seen:
+                            continue
+                        seen.add(slot)
+                        distance = bin(self._hashes[slot] ^ phash).count("1")
+                        if distance <= threshold:
+                            matches.append((distance, self._ids[slot]))
+        matches.sort()
+        return matches[:limit]
+    
+    def load(self, row_id: int) -> Optional[Dict]:
+        """Stored product name, analysis, description and keywords for a row"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT product_name, analysis, description, keywords, created_at FROM listings WHERE id = ?",
+                (row_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        analysis = json.loads(row[1])
+        analysis["palette"] = [tuple(entry) for entry in analysis.get("palette", [])]
+        return {
+            "product_name": row[0],
+            "analysis": ProductAnalysis(**analysis),
+            "description": ProductDescription(**json.loads(row[2])),
+            "keywords": json.loads(row[3]),
+            "created_at": row[4],
+        }
+
+
+@process_resource
+def get_listing_index() -> ListingIndex:
+    """Process-wide near-duplicate index of finished listings"""
+    return ListingIndex(os.path.join(CACHE_DIR, "listings.sqlite3"))
+
+
+class TermHit(NamedTuple):
+    kind: str
+    label: object
+    term: str
+    start: int
+    end: int
+    priority: int
+
+
+class TermMatcher:
+    """Word-boundary vocabulary matcher compiled once, run in a single pass
+    
+    Text is tokenized with one regex and each token is a single dict
+    lookup; multi-word terms are indexed by their first word, so
+    overlapping terms of different kinds ("sweater" the garment, "sweater
+    knit" the material) are all reported. Whole words only: "top" no
+    longer matches "laptop", nor "mini" "minimalist". Plural "s"/"es"
+    forms are compiled in.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+    
+    def __init__(self, vocabulary: Dict[str, list]):
+        self.kinds = list(vocabulary)
+        self._words = {}    # single word -> [(kind, label, term, priority)]
+        self._phrases = {}  # first word -> {remaining words: [(kind, label, term, priority)]}
+        for kind, groups in vocabulary.items():
+            for priority, (label, terms) in enumerate(groups):
+                for term in terms:
+                    words = self.TOKEN_PATTERN.findall(term.lower())
+                    entry = (kind, label, term, priority)
+                    for form in (words[-1], words[-1] + "s", words[-1] + "es"):
+                        if len(words) == 1:
+                            self._words.setdefault(form, []).append(entry)
+                        else:
+                            rest = tuple(words[1:-1]) + (form,)
+                            self._phrases.setdefault(words[0], {}).setdefault(rest, []).append(entry)
+        self._phrase_lengths = {
+            first: sorted({len(rest) for rest in rests}) for first, rests in self._phrases.items()
+        }
+    
+    def scan(self, text: str) -> List[TermHit]:
+        """Every vocabulary hit in text, in order of position"""
+        matches = list(self.TOKEN_PATTERN.finditer(text.lower()))
+        words = [m.group() for m in matches]
+        hits = []
+        for i, word in enumerate(words):
+            entries = self._words.get(word)
+            if entries:
+                start, end = matches[i].span()
+                hits.extend(TermHit(kind, label, term, start, end, priority)
+                            for kind, label, term, priority in entries)
+            rests = self._phrases.get(word)
+            if rests:
+                for n in self._phrase_lengths[word]:
+                    entries = rests.get(tuple(words[i + 1:i + 1 + n]))
+                    if entries:
+                        start, end = matches[i].start(), matches[i + n].end()
+                        hits.extend(TermHit(kind, label, term, start, end, priority)
+                                    for kind, label, term, priority in entries)
+        return hits
+    
+    @staticmethod
+    def best(hits: List[TermHit], kind: str, default=None):
+        """Highest-priority label of one kind among hits"""
+        best_hit = None
+        for hit in hits:
+            if hit.kind == kind and (best_hit is None or hit.priority < best_hit.priority):
+                best_hit = hit
+        return default if best_hit is None else best_hit.label
+
+
+class ColorMention(NamedTuple):
+    term: str
+    family: str
+    start: int
+    end: int
+
+
+class ColorValidator:
+    """Finds color words in generated copy that contradict the detected color
+    
+    One compiled, case-insensitive, word-boundary pattern over every color
+    family and its synonyms: "red" no longer matches "tailored", nor "tan"
+    "standout", while "crimson" and "sky-blue" are still caught. Words of
+    the detected color's family are allowed. Terms that are mostly not
+    colors in listing copy ("gold hardware", "mint condition") and pattern
+    families are left out of the vocabulary.
+    """
+    
+    def __init__(self, families: List[tuple], ambiguous: List[str] = ()):
+        skip = {term.lower() for term in ambiguous}
+        self.families = {}
+        for label, terms in families:
+            for term in terms:
+                if term.lower() not in skip:
+                    self.families.setdefault(term.lower(), label)
+        alternatives = sorted(self.families, key=len, reverse=True)
+        self.pattern = re.compile(
+            r"(?<![a-z0-9])(" + "|".join(re.escape(term) for term in alternatives) + r")(?:e?s)?(?![a-z0-9])",
+            re.IGNORECASE,
+        )
+    
+    def mentions(self, text: str) -> List[ColorMention]:
+        """Every color word in text with its span"""
+        return [ColorMention(m.group(1).lower(), self.families[m.group(1).lower()], m.start(), m.end())
+                for m in self.pattern.finditer(text)]
+    
+    def family_of(self, color: str) -> Optional[str]:
+        found = self.mentions(color)
+        return found[0].family if found else None
+    
+    def violations(self, text: str, color: str) -> List[ColorMention]:
+        """Color words in text that do not belong to the detected color"""
+        if not color:
+            return []
+        family = self.family_of(color)
+        own = {mention.term for mention in self.mentions(color)}
+        return [mention for mention in self.mentions(text)
+                if mention.family != family and mention.term not in own]
+    
+    def substitute(self, text: str, color: str, found: List[ColorMention]) -> str:
+        """text with each offending span replaced by the detected color"""
+        replacement = color.lower()
+        for mention in sorted(found, key=lambda m: m.start, reverse=True):
+            word = replacement.capitalize() if text[mention.start].isupper() else replacement
+            text = text[:mention.start] + word + text[mention.end:]
+        # "navy red dress" -> "navy navy dress" -> "navy dress"
+        return re.sub(r"(?<![a-z0-9])(" + re.escape(replacement) + r")(?:[\s\-]+\1)+(?![a-z0-9])",
+                      r"\1", text, flags=re.IGNORECASE)
+
+
+# Garment, color, material and style vocabularies shared by every analysis path
+TAXONOMY_PATH = os.environ.get(
+    "QUICKLIST_TAXONOMY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomy.json")
+)
+TAXONOMY_RELOAD_INTERVAL = 2.0  # seconds between mtime checks
+
+
+class Taxonomy:
+    """Versioned attribute vocabulary compiled into a single TermMatcher
+    
+    List order in the file is priority order: the first matching garment,
+    color, material or style wins.
+    """
+    
+    def __init__(self, data: Dict):
+        self.version = str(data["version"])
+        self.clip_labels = list(data["clip_labels"])
+        self.categories = {g["label"]: g.get("category", "Apparel & Fashion") for g in data["garments"]}
+        self.materials = {m["label"]: [m["label"], m["descriptor"]] for m in data["materials"]}
+        self.matcher = TermMatcher({
+            "garment": [(g["label"], g["terms"]) for g in data["garments"]],
+            "color": [(c["label"], c["terms"]) for c in data["colors"]],
+            "material": [(m["label"], m["terms"]) for m in data["materials"]],
+            "style": [(style["label"], style["terms"]) for style in data["styles"]],
+            "detail": [("Detailed", data.get("details", []))],
+        })
+        self.color_validator = ColorValidator(
+            [(c["label"], c["terms"]) for c in data["colors"] if c.get("validate", True)],
+            data.get("ambiguous_colors", []),
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "Taxonomy":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+    
+    def scan(self, text: str) -> List[TermHit]:
+        return self.matcher.scan(text)
+    
+    def category_for(self, garment: str) -> str:
+        return self.categories.get(garment, "Apparel & Fashion")
+    
+    def material_pair(self, material: str) -> List[str]:
+        return list(self.materials[material])
+
+
+class TaxonomyStore:
+    """Holds the compiled taxonomy and hot-reloads it when the file changes"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = os.path.getmtime(path)
+        self._taxonomy = Taxonomy.load(path)
+        self._checked_at = time.monotonic()
+    
+    def get(self) -> Taxonomy:
+        now = time.monotonic()
+        if now - self._checked_at < TAXONOMY_RELOAD_INTERVAL:
+            return self._taxonomy
+        with self._lock:
+            if now - self._checked_at >= TAXONOMY_RELOAD_INTERVAL:
+                self._checked_at = now
+                try:
+                    mtime = os.path.getmtime(self.path)
+                    if mtime != self._mtime:
+                        self._taxonomy = Taxonomy.load(self.path)
+                        self._mtime = mtime
+                        logger.info(f"Taxonomy reloaded: version {self._taxonomy.version}")
+                except Exception as e:
+                    # Keep serving the last good vocabulary while the file is being edited
+                    logger.warning(f"Taxonomy reload failed: {e}")
+        return self._taxonomy
+
+
+@process_resource
+def get_taxonomy_store() -> TaxonomyStore:
+    """Process-wide taxonomy, compiled once and shared by all sessions"""
+    return TaxonomyStore(TAXONOMY_PATH)
+
+
+def get_taxonomy() -> Taxonomy:
+    """Current taxonomy, reloaded when taxonomy.json changes"""
+    return get_taxonomy_store().get()
+
+
+class QuickListAI:
+    """AI-powered product listing generator"""
+    
+    VISION_PROVIDERS = ["google", "rekognition"]  # preference order, CLIP is the backstop
+    VISION_LABELS = {"google": "Google Vision", "rekognition": "Amazon Rekognition"}
+    # Analyses worth caching: a vision API looked at the photo. "clip" is only
+    # reported when CLIP's label was used; name-only results stay uncached.
+    CACHEABLE_PROVIDERS = ("google", "rekognition", "clip")
+    
+    PALETTE_BITS = 3  # bits kept per channel -> 512 histogram bins
+    
+    # Backdrop removal: estimated from a ring of border pixels
+    BACKDROP_BORDER = 4        # ring width in thumbnail pixels
+    BACKDROP_TOLERANCE = 45    # L1 RGB distance still counted as backdrop
+    MIN_FOREGROUND = 0.05      # below this the "garment" is probably backdrop too
+    
+    # Quantized RGB -> color name table compiled from _rgb_to_color_name
+    COLOR_LUT_BITS = 5  # 32x32x32 cells
+    COLOR_NAMES = [
+        "black", "white", "gray", "neutral", "red", "brown", "pink",
+        "orange", "green", "yellow", "teal", "blue", "purple", "light blue"
+    ]
+    _color_lut = None
+    _color_lut_lock = threading.Lock()
+    
+    @staticmethod
+    def analyze_with_vision_apis(image: Union[Image.Image, PreparedImage], product_name: str = "",
+                                 use_cache: bool = True) -> ProductAnalysis:
+        """Multi-tier FREE image detection with a persistent result cache in front"""
+        
+        # Decode, normalize and encode once - every tier reads from this
+        prepared = PreparedImage.ensure(image)
+        
+        cache, cache_key = None, None
+        if use_cache:
+            cache, cache_key, cached = QuickListAI._cache_lookup(prepared, product_name)
+            if cached is not None:
+                return cached
+        
+        analysis = QuickListAI._analyze_uncached(prepared, product_name)
+        QuickListAI._cache_store(cache, cache_key, analysis)
+        return analysis
+    
+    @staticmethod
+    async def analyze_with_vision_apis_async(image: Union[Image.Image, PreparedImage], product_name: str = "",
+                                             use_cache: bool = True) -> ProductAnalysis:
+        """analyze_with_vision_apis for asyncio callers: same tiers, cache and fallbacks
+        
+        Image work and the cache run on the I/O pool so the loop only waits
+        on sockets. Google Vision goes out on the loop's httpx client;
+        Rekognition (boto3 has no asyncio client) and the CLIP backstop run
+        on worker threads.
+        """
+        loop = asyncio.get_running_loop()
+        executor = get_io_executor()
+        prepared = await loop.run_in_executor(executor, PreparedImage.ensure, image)
+        
+        cache, cache_key = None, None
+        if use_cache:
+            cache, cache_key, cached = await loop.run_in_executor(
+                executor, QuickListAI._cache_lookup, prepared, product_name
+            )
+            if cached is not None:
+                return cached
+        
+        # Encoded upload and palette up front, so parsing a response costs the loop nothing
+        await loop.run_in_executor(executor, lambda: (prepared.jpeg_base64, prepared.palette))
+        analysis = await QuickListAI._analyze_uncached_async(prepared, product_name)
+        await loop.run_in_executor(executor, QuickListAI._cache_store, cache, cache_key, analysis)
+        return analysis
+    
+    @staticmethod
+    def _cache_lookup(prepared: PreparedImage, product_name: str) -> tuple:
+        """(cache, key, cached analysis or None); cache is None when unavailable"""
+        try:
+            cache = get_analysis_cache()
+            cache_key = AnalysisCache.make_key(prepared, product_name, get_taxonomy().version)
+            return cache, cache_key, cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Analysis cache unavailable: {e}")
+            return None, None, None
+    
+    @staticmethod
+    def _cache_store(cache: Optional[AnalysisCache], cache_key: str, analysis: ProductAnalysis) -> None:
+        # Name-only fallbacks (a vision API down or ignored) are not worth remembering
+        if cache is None or analysis.provider not in QuickListAI.CACHEABLE_PROVIDERS:
+            return
+        try:
+            cache.put(cache_key, analysis)
+        except Exception as e:
+            logger.warning(f"Analysis cache write failed: {e}")
+    
+    @staticmethod
+    def _analyze_uncached(prepared: PreparedImage, product_name: str, race: bool = None) -> ProductAnalysis:
+        """Google Vision → Amazon Rekognition → CLIP, optionally racing the first two"""
+        settings = QuickListAI._vision_settings()
+        if race is None:
+            race = settings["race"]
+        
+        if race:
+            analysis = QuickListAI._race_vision_providers(prepared, product_name, settings["grace_seconds"])
+            if analysis is not None:
+                return analysis
+        else:
+            for provider in QuickListAI.VISION_PROVIDERS:
+                analysis = getattr(QuickListAI, f"_analyze_with_{provider}")(prepared, product_name)
+                if analysis is not None:
+                    return analysis
+        
+        # ============================================
+        # TIER 3: CLIP (HuggingFace - Unlimited Free)
+        # ============================================
+        return QuickListAI._analyze_with_clip(prepared, product_name)
+    
+    @staticmethod
+    async def _analyze_uncached_async(prepared: PreparedImage, product_name: str,
+                                      race: bool = None) -> ProductAnalysis:
+        """_analyze_uncached on the event loop"""
+        settings = QuickListAI._vision_settings()
+        if race is None:
+            race = settings["race"]
+        
+        if race:
+            analysis = await QuickListAI._race_vision_providers_async(prepared, product_name,
+                                                                      settings["grace_seconds"])
+            if analysis is not None:
+                return analysis
+        else:
+            for provider in QuickListAI.VISION_PROVIDERS:
+                analysis = await QuickListAI._analyze_with_async(provider, prepared, product_name)
+                if analysis is not None:
+                    return analysis
+        
+        return await asyncio.get_running_loop().run_in_executor(
+            get_io_executor(), QuickListAI._analyze_with_clip, prepared, product_name
+        )
+    
+    @staticmethod
+    async def _analyze_with_async(provider: str, prepared: PreparedImage, product_name: str):
+        """One vision tier from the event loop; None when unconfigured or failed
+        
+        Tiers with a _request_<provider> use httpx, the rest a worker thread.
+        """
+        request = QuickListAI._async_request(provider)
+        if request is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                get_io_executor(), getattr(QuickListAI, f"_analyze_with_{provider}"), prepared, product_name
+            )
+        try:
+            return await QuickListAI._post_request_async(request(prepared, product_name))
+        except Exception as e:
+            logger.warning(f"{QuickListAI.VISION_LABELS[provider]} failed: {e}")
+        return None
+    
+    @staticmethod
+    def _vision_settings() -> Dict:
+        """[vision] secrets: race = true enables concurrent tiers, grace_seconds tunes the wait"""
+        settings = secrets_section("vision")
+        return {
+            "race": bool(settings.get("race", False)),
+            "grace_seconds": float(settings.get("grace_seconds", 1.5)),
+        }
+    
+    @staticmethod
+    def _race_vision_providers(prepared: PreparedImage, product_name: str, grace_seconds: float):
+        """Dispatch all vision providers at once and keep the most preferred answer
+        
+        The first success starts a grace window; a more preferred provider
+        that answers inside it still wins. Nothing is waited on once no
+        pending provider could beat the best answer so far. Losers are
+        cancelled if not yet started and otherwise ignored.
+        """
+        executor = get_io_executor()
+        futures = {
+            executor.submit(getattr(QuickListAI, f"_analyze_with_{provider}"), prepared, product_name): rank
+            for rank, provider in enumerate(QuickListAI.VISION_PROVIDERS)
+        }
+        pending = set(futures)
+        results = {}
+        deadline = None
+        
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # grace window expired
+            for future in done:
+                try:
+                    analysis = future.result()
+                except Exception as e:
+                    logger.warning(f"Vision provider failed: {e}")
+                    analysis = None
+                if analysis is not None:
+                    results[futures[future]] = analysis
+            if results:
+                best_rank = min(results)
+                if all(futures[future] > best_rank for future in pending):
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + grace_seconds
+        
+        for future in pending:
+            future.cancel()
+        
+        if not results:
+            return None
+        winner = results[min(results)]
+        logger.info(f"Vision race won by {winner.provider}")
+        return winner
+    
+    @staticmethod
+    async def _race_vision_providers_async(prepared: PreparedImage, product_name: str, grace_seconds: float):
+        """_race_vision_providers on the event loop; losers are cancelled outright"""
+        tasks = {
+            asyncio.ensure_future(QuickListAI._analyze_with_async(provider, prepared, product_name)): rank
+            for rank, provider in enumerate(QuickListAI.VISION_PROVIDERS)
+        }
+        pending = set(tasks)
+        results = {}
+        deadline = None
+        
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break  # grace window expired
+            for task in done:
+                try:
+                    analysis = task.result()
+                except Exception as e:
+                    logger.warning(f"Vision provider failed: {e}")
+                    analysis = None
+                if analysis is not None:
+                    results[tasks[task]] = analysis
+            if results:
+                best_rank = min(results)
+                if all(tasks[task] > best_rank for task in pending):
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + grace_seconds
+        
+        for task in pending:
+            task.cancel()
+        
+        if not results:
+            return None
+        winner = results[min(results)]
+        logger.info(f"Vision race won by {winner.provider}")
+        return winner
+    
+    @staticmethod
+    def _analyze_with_google(prepared: PreparedImage, product_name: str):
+        """Google Vision tier; None when unconfigured or failed"""
+        # ============================================
+        # TIER 1: Google Cloud Vision API (1000/month free)
+        # ============================================
+        try:
+            return QuickListAI._post_request(QuickListAI._request_google(prepared, product_name))
+        except Exception as e:
+            logger.warning(f"Google Vision failed: {e}")
+        return None
+    
+    @staticmethod
+    def _request_google(prepared: PreparedImage, product_name: str) -> Optional[Dict]:
+        # Check if Google API key exists
+        google_key = get_secret("google", "vision_api_key")
+        if not google_key:
+            return None
+        return {
+            "url": provider_url("google", f"/v1/images:annotate?key={google_key}"),
+            "json": {
+                "requests": [{
+                    "image": {"content": prepared.jpeg_base64},
+                    "features": [
+                        {"type": "LABEL_DETECTION", "maxResults": 10},
+                        {"type": "OBJECT_LOCALIZATION", "maxResults": 5},
+                        {"type": "IMAGE_PROPERTIES"}
+                    ]
+                }]
+            },
+            "timeout": 10,
+            "parse": lambda response: QuickListAI._parse_google_response(response, prepared, product_name)
+        }
+    
+    @staticmethod
+    def _parse_google_response(response, prepared: PreparedImage, product_name: str) -> Optional[ProductAnalysis]:
+        if response.status_code != 200:
+            return None
+        result = response.json()
+        labels = [label['description'].lower() for label in result['responses'][0].get('labelAnnotations', [])]
+        objects = [obj['name'].lower() for obj in result['responses'][0].get('localizedObjectAnnotations', [])]
+        colors_data = result['responses'][0].get('imagePropertiesAnnotation', {}).get('dominantColors', {}).get('colors', [])
+        
+        # Category, type, materials and style in one matcher pass
+        category, specific_type, materials, style = QuickListAI._analyze_labels(labels, objects, product_name)
+        
+        # Extract dominant color
+        dominant_color = "neutral"
+        if colors_data:
+            rgb = colors_data[0].get('color', {})
+            dominant_color = QuickListAI._rgb_to_color_name(rgb.get('red', 0), rgb.get('green', 0), rgb.get('blue', 0))
+        
+        palette = QuickListAI._extract_palette(prepared)
+        
+        return ProductAnalysis(
+            category=category,
+            materials=materials,
+            colors=[dominant_color] + [hex_code for hex_code, _ in palette],
+            style=style,
+            confidence=0.92,
+            specific_type=specific_type,
+            palette=palette,
+            provider="google"
+        )
+    
+    @staticmethod
+    def _analyze_with_rekognition(prepared: PreparedImage, product_name: str):
+        """Amazon Rekognition tier; None when unconfigured or failed"""
+        # ============================================
+        # TIER 2: Amazon Rekognition (5000/month free first year)
+        # ============================================
+        try:
+            client = get_rekognition_client()
+            
+            if client is not None:
+                response = client.detect_labels(
+                    Image={'Bytes': prepared.jpeg_bytes},
+                    MaxLabels=15,
+                    MinConfidence=70
+                )
+                
+                labels = [label['Name'].lower() for label in response['Labels']]
+                
+                category, specific_type, materials, style = QuickListAI._analyze_labels(labels, [], product_name)
+                
+                # Get color from image
+                dominant_color = QuickListAI._extract_dominant_color(prepared)
+                palette = QuickListAI._extract_palette(prepared)
+                
+                return ProductAnalysis(
+                    category=category,
+                    materials=materials,
+                    colors=[dominant_color] + [hex_code for hex_code, _ in palette],
+                    style=style,
+                    confidence=0.89,
+                    specific_type=specific_type,
+                    palette=palette,
+                    provider="rekognition"
+                )
+        except Exception as e:
+            logger.warning(f"Amazon Rekognition failed: {e}")
+        return None
+    
+    @staticmethod
+    def _analyze_labels(labels: List[str], objects: List[str], product_name: str) -> tuple:
+        """Category, type, materials and style from a single matcher pass"""
+        labels_text = ' '.join(labels)
+        hits = get_taxonomy().scan(' '.join([labels_text] + objects + [product_name]))
+        
+        # Materials and style only ever looked at the labels themselves
+        label_hits = [hit for hit in hits if hit.end <= len(labels_text)]
+        
+        category, specific_type = QuickListAI._parse_google_vision(labels, objects, product_name, hits)
+        materials, style = QuickListAI._detect_materials_style(labels, category, label_hits)
+        return category, specific_type, materials, style
+    
+    @staticmethod
+    def _parse_google_vision(labels: List[str], objects: List[str], product_name: str,
+                             hits: List[TermHit] = None) -> tuple:
+        """Parse Google Vision labels with comprehensive fashion detection"""
+        taxonomy = get_taxonomy()
+        if hits is None:
+            hits = taxonomy.scan(' '.join(labels + objects + [product_name]))
+        
+        # Specific garments are ordered ahead of the generic clothing terms
+        garment = TermMatcher.best(hits, "garment")
+        if garment is None:
+            return "Product", "Item"
+        return taxonomy.category_for(garment), garment
+    
+    @staticmethod
+    def _parse_amazon_labels(labels: List[str], product_name: str) -> tuple:
+        """Parse Amazon Rekognition labels"""
+        return QuickListAI._parse_google_vision(labels, [], product_name)
+    
+    @staticmethod
+    def _rgb_to_color_name(r: int, g: int, b: int) -> str:
+        """Convert RGB to color name with comprehensive accuracy"""
+        # Check for black/very dark
+        if r < 50 and g < 50 and b < 50:
+            return "black"
+        
+        # Check for white/off-white
+        if min(r, g, b) > 200 and max(r, g, b) - min(r, g, b) < 25:
+            return "white"
+        
+        # Check for cream/ivory (warm whites)
+        if r > 220 and g > 215 and b > 200 and r > b:
+            return "white"
+        
+        # Check for gray (RGB values close to each other)
+        if max(r, g, b) - min(r, g, b) < 30 and min(r, g, b) > 50 and max(r, g, b) < 200:
+            return "gray"
+        
+        # Calculate dominance for color detection
+        values = sorted([r, g, b], reverse=True)
+        dominance = values[0] - values[1]
+        
+        # Need at least 25 point difference for specific colors
+        if dominance < 25:
+            return "neutral"
+        
+        # RED family
+        if r > g and r > b:
+            if r > 180 and g < 100 and b < 100:
+                return "red"
+            elif r > 150 and g > 100 and b < 80:
+                return "brown"
+            elif r > 200 and g > 150 and b > 150:
+                return "pink"
+            elif r > 180 and g > 120 and b < 120:
+                return "orange"
+            else:
+                return "pink"
+        
+        # GREEN family
+        elif g > r and g > b:
+            if g > 150 and r < 100 and b < 100:
+                return "green"
+            elif g > 180 and r > 150 and b < 100:
+                return "yellow"
+            elif g > r and b > r and abs(g - b) < 40:
+                return "teal"
+            else:
+                return "green"
+        
+        # BLUE family
+        elif b > r and b > g:
+            if b > 180 and r < 100 and g < 100:
+                return "blue"
+            elif b > 150 and r > 100 and g < b - 30:
+                return "purple"
+            elif b > 200 and g > 180:
+                return "light blue"
+            else:
+                return "blue"
+        
+        # YELLOW/ORANGE
+        elif r > 150 and g > 150 and b < 100:
+            if r > g:
+                return "orange"
+            else:
+                return "yellow"
+        
+        # Fallback
+        return "neutral"
+    
+    @staticmethod
+    def _build_color_lut() -> np.ndarray:
+        """Evaluate the reference _rgb_to_color_name at every cell center"""
+        bits = QuickListAI.COLOR_LUT_BITS
+        step = 1 << (8 - bits)
+        centers = [i * step + step // 2 for i in range(1 << bits)]
+        name_index = {name: i for i, name in enumerate(QuickListAI.COLOR_NAMES)}
+        lut = np.empty((len(centers),) * 3, dtype=np.uint8)
+        for ri, r in enumerate(centers):
+            for gi, g in enumerate(centers):
+                for bi, b in enumerate(centers):
+                    lut[ri, gi, bi] = name_index[QuickListAI._rgb_to_color_name(r, g, b)]
+        return lut
+    
+    @staticmethod
+    def verify_color_lut(lut: np.ndarray, samples: int = 0) -> int:
+        """Count cells where the table disagrees with _rgb_to_color_name (0 == valid)
+        
+        With samples=0 every cell center is checked; otherwise a random subset.
+        """
+        bits = QuickListAI.COLOR_LUT_BITS
+        step = 1 << (8 - bits)
+        size = 1 << bits
+        if lut.shape != (size, size, size):
+            return size ** 3
+        if samples:
+            cells = np.random.default_rng().integers(0, size, (samples, 3))
+        else:
+            cells = np.indices((size, size, size)).reshape(3, -1).T
+        mismatches = 0
+        for ri, gi, bi in cells:
+            r, g, b = (int(v) * step + step // 2 for v in (ri, gi, bi))
+            expected = QuickListAI._rgb_to_color_name(r, g, b)
+            if QuickListAI.COLOR_NAMES[lut[ri, gi, bi]] != expected:
+                mismatches += 1
+        return mismatches
+    
+    @staticmethod
+    def _get_color_lut() -> np.ndarray:
+        """Load the color table from disk, rebuilding it when the reference function changes"""
+        if QuickListAI._color_lut is not None:
+            return QuickListAI._color_lut
+        with QuickListAI._color_lut_lock:
+            if QuickListAI._color_lut is not None:
+                return QuickListAI._color_lut
+            
+            # Fingerprint the reference thresholds so editing them invalidates the file
+            code = QuickListAI._rgb_to_color_name.__code__
+            fingerprint = hashlib.sha1(
+                code.co_code + repr((code.co_consts, QuickListAI.COLOR_NAMES, QuickListAI.COLOR_LUT_BITS)).encode()
+            ).hexdigest()[:12]
+            path = os.path.join(CACHE_DIR, f"color_lut_{fingerprint}.npy")
+            
+            lut = None
+            try:
+                lut = np.load(path)
+                if QuickListAI.verify_color_lut(lut, samples=256):
+                    lut = None
+            except Exception:
+                lut = None
+            
+            if lut is None:
+                lut = QuickListAI._build_color_lut()
+                try:
+                    os.makedirs(CACHE_DIR, exist_ok=True)
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "wb") as f:
+                        np.save(f, lut)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    logger.warning(f"Color table cache write failed: {e}")
+            
+            QuickListAI._color_lut = lut
+            return lut
+    
+    @staticmethod
+    def classify_pixels(pixels: np.ndarray) -> np.ndarray:
+        """Color-name index (into COLOR_NAMES) for every pixel of an (..., 3) uint8 array"""
+        lut = QuickListAI._get_color_lut()
+        shift = 8 - QuickListAI.COLOR_LUT_BITS
+        pixels = np.asarray(pixels, dtype=np.uint8) >> shift
+        return lut[pixels[..., 0], pixels[..., 1], pixels[..., 2]]
+    
+    @staticmethod
+    def _vote_color_name(pixels: np.ndarray) -> str:
+        """Dominant named color decided by per-pixel vote"""
+        votes = np.bincount(QuickListAI.classify_pixels(pixels).ravel(), minlength=len(QuickListAI.COLOR_NAMES))
+        return QuickListAI.COLOR_NAMES[int(np.argmax(votes))]
+    
+    @staticmethod
+    def _extract_dominant_color(image: Union[Image.Image, PreparedImage]) -> str:
+        """Extract dominant color from image (garment pixels only)"""
+        return PreparedImage.ensure(image).dominant_color
+    
+    @staticmethod
+    def foreground_masks(thumbnails: np.ndarray) -> np.ndarray:
+        """Foreground masks for one (H, W, 3) or a stacked (N, H, W, 3) batch of thumbnails
+        
+        The backdrop color is the median of a ring of border pixels; anything
+        within BACKDROP_TOLERANCE of it is masked out. When the border is not
+        a plain backdrop, or almost nothing survives, the full frame is kept.
+        Returns an (N, H, W) boolean array.
+        """
+        batch = np.asarray(thumbnails, dtype=np.uint8)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        batch = batch.astype(np.int16)
+        n_images = batch.shape[0]
+        ring = QuickListAI.BACKDROP_BORDER
+        tolerance = QuickListAI.BACKDROP_TOLERANCE
+        
+        border = np.concatenate([
+            batch[:, :ring].reshape(n_images, -1, 3),
+            batch[:, -ring:].reshape(n_images, -1, 3),
+            batch[:, ring:-ring, :ring].reshape(n_images, -1, 3),
+            batch[:, ring:-ring, -ring:].reshape(n_images, -1, 3),
+        ], axis=1)
+        backdrop = np.median(border, axis=1)
+        border_spread = np.median(np.abs(border - backdrop[:, np.newaxis]).sum(axis=-1), axis=1)
+        
+        distance = np.abs(batch - backdrop[:, np.newaxis, np.newaxis]).sum(axis=-1)
+        masks = distance > tolerance
+        
+        usable = (border_spread < tolerance / 2) & (masks.mean(axis=(1, 2)) >= QuickListAI.MIN_FOREGROUND)
+        masks[~usable] = True
+        return masks
+    
+    @staticmethod
+    def extract_palettes(thumbnails: np.ndarray, n_colors: int = 3, masks: np.ndarray = None) -> List[List[Tuple[str, float]]]:
+        """Top-N weighted colors for one (H, W, 3) or a stacked (N, H, W, 3) batch of thumbnails
+        
+        Pixels are quantized into a coarse RGB histogram; each of the N most
+        populated bins is reported as the mean color of its pixels plus the
+        fraction of the (masked) image it covers. The whole batch is one
+        bincount pass. Optional (N, H, W) masks drop backdrop pixels.
+        """
+        batch = np.asarray(thumbnails, dtype=np.uint8)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        n_images = batch.shape[0]
+        pixels = batch.reshape(n_images, -1, 3)
+        if masks is None:
+            keep = np.ones(pixels.shape[:2], dtype=np.float64)
+        else:
+            keep = np.asarray(masks, dtype=np.float64).reshape(n_images, -1)
+        
+        bits = QuickListAI.PALETTE_BITS
+        n_bins = 1 << (3 * bits)
+        quantized = (pixels >> (8 - bits)).astype(np.int64)
+        bin_index = (quantized[..., 0] << (2 * bits)) | (quantized[..., 1] << bits) | quantized[..., 2]
+        bin_index += (np.arange(n_images, dtype=np.int64) * n_bins)[:, np.newaxis]
+        flat_index = bin_index.ravel()
+        flat_keep = keep.ravel()
+        
+        counts = np.bincount(flat_index, weights=flat_keep, minlength=n_images * n_bins).reshape(n_images, n_bins)
+        sums = np.stack([
+            np.bincount(flat_index, weights=pixels[..., c].ravel() * flat_keep, minlength=n_images * n_bins)
+            for c in range(3)
+        ], axis=-1).reshape(n_images, n_bins, 3)
+        
+        top = np.argsort(-counts, axis=1, kind="stable")[:, :n_colors]
+        top_counts = np.take_along_axis(counts, top, axis=1)
+        top_means = np.take_along_axis(sums, top[..., np.newaxis], axis=1) / np.maximum(top_counts, 1)[..., np.newaxis]
+        top_weights = top_counts / np.maximum(keep.sum(axis=1), 1)[:, np.newaxis]
+        top_means = np.clip(np.rint(top_means), 0, 255).astype(np.uint8)
+        
+        palettes = []
+        for means, weights, bin_counts in zip(top_means, top_weights, top_counts):
+            palettes.append([
+                ("#{:02x}{:02x}{:02x}".format(*rgb), round(float(weight), 3))
+                for rgb, weight, count in zip(means, weights, bin_counts) if count > 0
+            ])
+        return palettes
+    
+    @staticmethod
+    def _extract_palette(image: Union[Image.Image, PreparedImage], n_colors: int = 3) -> List[Tuple[str, float]]:
+        """Weighted palette of the garment (backdrop removed) for a single image"""
+        prepared = PreparedImage.ensure(image)
+        if n_colors == 3:
+            return list(prepared.palette)
+        return QuickListAI.extract_palettes(prepared.thumbnail, n_colors, prepared.foreground_mask[np.newaxis])[0]
+    
+    @staticmethod
+    def _detect_materials_style(labels: List[str], category: str, hits: List[TermHit] = None) -> tuple:
+        """Comprehensive material and style detection from labels"""
+        taxonomy = get_taxonomy()
+        if hits is None:
+            hits = taxonomy.scan(' '.join(labels))
+        
+        material = TermMatcher.best(hits, "material")
+        if material:
+            materials = taxonomy.material_pair(material)
+        elif category == "Apparel & Fashion":
+            materials = ["Fabric", "Quality Material"]
+        else:
+            materials = ["Quality", "Fabric"]
+        
+        style = TermMatcher.best(hits, "style", "Classic")
+        
+        return materials, style
+    
+    @staticmethod
+    def _parse_product_name(product_name: str, taxonomy: "Taxonomy") -> Dict:
+        """Garment, color, materials and style named in the product name (None when absent)"""
+        hits = taxonomy.scan(product_name)
+        garment = TermMatcher.best(hits, "garment")
+        material = TermMatcher.best(hits, "material")
+        style = TermMatcher.best(hits, "style")
+        if style is None and TermMatcher.best(hits, "detail"):
+            style = "Detailed"
+        return {
+            "category": taxonomy.category_for(garment) if garment else None,
+            "specific_type": garment,
+            "color": TermMatcher.best(hits, "color"),
+            "materials": taxonomy.material_pair(material) if material else None,
+            "style": style,
+        }
+    
+    @staticmethod
+    def _analyze_with_clip(image: Union[Image.Image, PreparedImage], product_name: str) -> ProductAnalysis:
+        """Fallback CLIP analysis with comprehensive fashion detection"""
+        try:
+            prepared = PreparedImage.ensure(image)
+            img_bytes = prepared.png_bytes
+            
+            headers = {"Content-Type": "application/octet-stream"}
+            API_URL = provider_url("huggingface", "/models/openai/clip-vit-base-patch32")
+            
+            prod_lower = product_name.lower()
+            taxonomy = get_taxonomy()
+            named = QuickListAI._parse_product_name(prod_lower, taxonomy)
+            
+            # COMPREHENSIVE GARMENT DETECTION
+            category = named["category"] or "Apparel & Fashion"
+            specific_type = named["specific_type"] or "Clothing"
+            
+            # Detect category using CLIP
+            categories = taxonomy.clip_labels
+            used_clip = False
+            
+            response = get_http_pool().post(
+                API_URL,
+                headers=headers,
+                data=img_bytes,
+                params={"candidate_labels": ",".join(categories)},
+                timeout=20
+            )
+            
+            # Only override user input if CLIP is very confident AND user didn't specify
+            if response.status_code == 200 and not prod_lower:
+                result = response.json()
+                if isinstance(result, list) and len(result) > 0:
+                    detected = result[0].get('label', '').lower()
+                    
+                    garment = TermMatcher.best(taxonomy.scan(detected), "garment")
+                    if garment:
+                        category = taxonomy.category_for(garment)
+                        specific_type = garment
+                        used_clip = True
+            
+            # Color named in the product name wins over the pixels
+            dominant_color = named["color"] or QuickListAI._extract_dominant_color(prepared)
+            style = named["style"] or "Classic"
+            materials = named["materials"] or ["Quality", "Fabric"]
+            
+            palette = QuickListAI._extract_palette(prepared)
+            
+            return ProductAnalysis(
+                category=category,
+                materials=materials,
+                colors=[dominant_color] + [hex_code for hex_code, _ in palette],
+                style=style,
+                confidence=0.82,
+                specific_type=specific_type,
+                palette=palette,
+                provider="clip" if used_clip else "product name"
+            )
+            
+        except Exception as e:
+            # Fallback with comprehensive detection based on product name
+            named = QuickListAI._parse_product_name(product_name.lower(), get_taxonomy())
+            specific_type = named["specific_type"] or "Clothing"
+            category = named["category"] or "Apparel & Fashion"
+            materials = named["materials"] or ["Quality", "Fabric"]
+            style = named["style"] or "Classic"
+            color = named["color"] or "neutral"
+            
+            # Palette is local NumPy work, so it usually survives a CLIP outage
+            try:
+                palette = QuickListAI._extract_palette(image)
+            except Exception:
+                palette = []
+            
+            return ProductAnalysis(
+                category=category,
+                materials=materials,
+                colors=[color] + [hex_code for hex_code, _ in palette],
+                style=style,
+                confidence=0.65,
+                specific_type=specific_type,
+                palette=palette,
+                provider="product name"
+            )
+    
+    @staticmethod
+    def clean_json_response(text: str) -> str:
+        """Extract JSON from response"""
+        try:
+            return json.dumps(extract_json(text).value)
+        except ValueError:
+            return text
+    
+    @staticmethod
+    def parse_json_response(text: str, provider: str = "", keys: Tuple[str, ...] = ()) -> Dict:
+        """The JSON object (the one with keys, if several) in an LLM response, repaired where needed"""
+        extraction = extract_json(text, keys)
+        if extraction.repairs:
+            label = QuickListAI.LLM_LABELS.get(provider, provider)
+            logger.info(f"{label} JSON repaired: {', '.join(extraction.repairs)}")
+        return extraction.value
+    
+    # LLM cascade, in fallback order. Each name maps to _call_<name>.
+    LLM_TIERS = ["groq", "deepinfra", "together", "pollinations", "hf_qwen", "hf_mistral"]
+    LLM_LABELS = {
+        "groq": "Groq",
+        "deepinfra": "DeepInfra",
+        "together": "Together AI",
+        "pollinations": "Pollinations",
+        "hf_qwen": "Qwen",
+        "hf_mistral": "Mistral",
+    }
+    PROBE_PROMPT = 'Respond ONLY with this JSON: {"ok": true}'
+    
+    @staticmethod
+    def _call_llm(provider: str, prompt: str, max_tokens: int = 700, temperature: float = 0.7,
+                  json_mode: bool = True, on_text: Callable[[str], None] = None, kind: str = "") -> Optional[str]:
+        """Raw completion from one LLM tier through its circuit breaker
+        
+        Returns None when the tier is unconfigured or its circuit is open.
+        Provider errors are recorded against the breaker and re-raised.
+        With on_text, tiers that can stream (_stream_<provider>) call it
+        with the accumulated text after every chunk. kind names the
+        breaker latency series the call counts towards (see _hedge_delay).
+        """
+        breaker = get_circuit_breaker(provider)
+        if not breaker.allow(probe=lambda: QuickListAI._probe_llm(provider)):
+            return None
+        
+        stream = getattr(QuickListAI, f"_stream_{provider}", None) if on_text else None
+        call = getattr(QuickListAI, f"_call_{provider}")
+        started = time.perf_counter()
+        try:
+            if stream is not None:
+                chunks = stream(prompt, max_tokens, temperature)
+                text = None
+                if chunks is not None:
+                    parts = []
+                    for chunk in chunks:
+                        parts.append(chunk)
+                        on_text("".join(parts))
+                    text = "".join(parts)
+                    if not text:
+                        raise ValueError("empty response")
+            else:
+                text = call(prompt, max_tokens, temperature, json_mode)
+        except Exception:
+            breaker.record(False, time.perf_counter() - started)
+            raise
+        if text is not None:
+            breaker.record(True, time.perf_counter() - started, kind)
+        return text
+    
+    @staticmethod
+    async def _call_llm_async(provider: str, prompt: str, max_tokens: int = 700, temperature: float = 0.7,
+                              json_mode: bool = True, kind: str = "") -> Optional[str]:
+        """_call_llm from the event loop, through the same circuit breaker
+        
+        Tiers with a _request_<provider> go out on the loop's httpx client;
+        the rest, and every tier when httpx is not installed, run their
+        _call_<provider> on the I/O pool. Nothing streams.
+        """
+        breaker = get_circuit_breaker(provider)
+        if not breaker.allow(probe=lambda: QuickListAI._probe_llm(provider)):
+            return None
+        
+        request = QuickListAI._async_request(provider)
+        started = time.perf_counter()
+        try:
+            if request is not None:
+                text = await QuickListAI._post_request_async(request(prompt, max_tokens, temperature, json_mode))
+            else:
+                text = await asyncio.get_running_loop().run_in_executor(
+                    get_io_executor(), getattr(QuickListAI, f"_call_{provider}"),
+                    prompt, max_tokens, temperature, json_mode
+                )
+        except Exception:
+            breaker.record(False, time.perf_counter() - started)
+            raise
+        if text is not None:
+            breaker.record(True, time.perf_counter() - started, kind)
+        return text
+    
+    @staticmethod
+    def _probe_llm(provider: str) -> bool:
+        """Cheap health check used by the breaker while a tier is open"""
+        call = getattr(QuickListAI, f"_call_{provider}")
+        return call(QuickListAI.PROBE_PROMPT, 16, 0.0, True) is not None
+    
+    @staticmethod
+    def _call_groq(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[str]:
+        # TIER 1: Groq
+        client = get_groq_client()
+        if client is None:
+            return None
+        kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+        completion = client.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        return completion.choices[0].message.content
+    
+    @staticmethod
+    def _stream_groq(prompt: str, max_tokens: int, temperature: float):
+        # Groq's JSON mode cannot stream; the prompt already demands JSON only
+        client = get_groq_client()
+        if client is None:
+            return None
+        
+        def chunks():
+            for chunk in client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            ):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        return chunks()
+    
+    @staticmethod
+    def _stream_openai_compatible(url: str, api_key: str, model: str, prompt: str,
+                                  max_tokens: int, temperature: float):
+        """Content deltas from an OpenAI-compatible server-sent event stream"""
+        response = get_http_pool().post(
+            url,
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
+            json={
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "stream": True
+            },
+            timeout=25,
+            stream=True
+        )
+        with response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+    
+    @staticmethod
+    def _stream_deepinfra(prompt: str, max_tokens: int, temperature: float):
+        api_key = get_secret("deepinfra", "api_key")
+        if not api_key:
+            return None
+        return QuickListAI._stream_openai_compatible(
+            provider_url("deepinfra", "/v1/openai/chat/completions"), api_key,
+            "meta-llama/Meta-Llama-3.1-70B-Instruct", prompt, max_tokens, temperature
+        )
+    
+    @staticmethod
+    def _stream_together(prompt: str, max_tokens: int, temperature: float):
+        api_key = get_secret("together", "api_key")
+        if not api_key:
+            return None
+        return QuickListAI._stream_openai_compatible(
+            provider_url("together", "/v1/chat/completions"), api_key,
+            "meta-llama/Meta-Llama-3.1-70B-Instruct-Turbo", prompt, max_tokens, temperature
+        )
+    
+    # Tiers reached over plain HTTP describe their request once: _request_<provider>
+    # returns the post arguments plus "parse", which turns the response into text.
+    # _call_<provider> sends it on the shared pool; the async API sends it with httpx.
+    
+    @staticmethod
+    def _post_request(request: Optional[Dict]) -> Optional[str]:
+        """Send a tier's request on the shared HTTP pool; None when the tier is unconfigured"""
+        if request is None:
+            return None
+        request = dict(request)
+        url, parse = request.pop("url"), request.pop("parse")
+        return parse(get_http_pool().post(url, **request))
+    
+    @staticmethod
+    def _async_request(provider: str) -> Optional[Callable[..., Optional[Dict]]]:
+        """_request_<provider> for the async API; None sends the tier to a worker thread"""
+        if not HAS_HTTPX:
+            _warn_without_httpx()
+            return None
+        return getattr(QuickListAI, f"_request_{provider}", None)
+    
+    @staticmethod
+    async def _post_request_async(request: Optional[Dict]) -> Optional[str]:
+        """_post_request on the running loop's httpx client"""
+        if request is None:
+            return None
+        request = dict(request)
+        url, parse = request.pop("url"), request.pop("parse")
+        return parse(await get_async_http_client().post(url, **request))
+    
+    @staticmethod
+    def _parse_chat_response(response) -> str:
+        """Message text from an OpenAI-compatible chat completion"""
+        response.raise_for_status()
+        result = response.json()
+        generated = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        if not generated:
+            raise ValueError("empty response")
+        return generated
+    
+    @staticmethod
+    def _request_groq(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[Dict]:
+        # Groq's OpenAI-compatible endpoint; only the async API uses it, the SDK serves _call_groq
+        api_key = get_secret("groq", "api_key")
+        if not api_key:
+            return None
+        body = {
+            "model": "llama-3.3-70b-versatile",
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+        return {
+            "url": provider_url("groq", "/openai/v1/chat/completions"),
+            "headers": {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
+            "json": body,
+            "timeout": 25,
+            "parse": QuickListAI._parse_chat_response
+        }
+    
+    @staticmethod
+    def _request_deepinfra(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[Dict]:
+        # TIER 2: DeepInfra (needs an API key; anonymous calls are rejected)
+        api_key = get_secret("deepinfra", "api_key")
+        if not api_key:
+            return None
+        return {
+            "url": provider_url("deepinfra", "/v1/inference/meta-llama/Meta-Llama-3.1-70B-Instruct"),
+            "headers": {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
+            "json": {"input": prompt, "max_tokens": max_tokens, "temperature": temperature},
+            "timeout": 25,
+            "parse": QuickListAI._parse_deepinfra_response
+        }
+    
+    @staticmethod
+    def _parse_deepinfra_response(response) -> str:
+        response.raise_for_status()
+        result = response.json()
+        generated = result.get('results', [{}])[0].get('generated_text', '') or result.get('output', '')
+        if not generated:
+            raise ValueError("empty response")
+        return generated
+    
+    @staticmethod
+    def _call_deepinfra(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[str]:
+        return QuickListAI._post_request(QuickListAI._request_deepinfra(prompt, max_tokens, temperature, json_mode))
+    
+    @staticmethod
+    def _request_together(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[Dict]:
+        # TIER 3: Together AI (needs an API key)
+        api_key = get_secret("together", "api_key")
+        if not api_key:
+            return None
+        return {
+            "url": provider_url("together", "/v1/chat/completions"),
+            "headers": {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
+            "json": {
+                "model": "meta-llama/Meta-Llama-3.1-70B-Instruct-Turbo",
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            },
+            "timeout": 25,
+            "parse": QuickListAI._parse_chat_response
+        }
+    
+    @staticmethod
+    def _call_together(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[str]:
+        return QuickListAI._post_request(QuickListAI._request_together(prompt, max_tokens, temperature, json_mode))
+    
+    @staticmethod
+    def _request_pollinations(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Dict:
+        # TIER 4: Pollinations
+        content = f"{prompt}\n\nIMPORTANT: Respond ONLY with valid JSON." if json_mode else prompt
+        return {
+            "url": provider_url("pollinations", "/"),
+            "json": {
+                "messages": [{"role": "user", "content": content}],
+                "model": "openai",
+                "jsonMode": json_mode
+            },
+            "timeout": 25,
+            "parse": QuickListAI._parse_text_response
+        }
+    
+    @staticmethod
+    def _parse_text_response(response) -> str:
+        response.raise_for_status()
+        generated = response.text.strip()
+        if not generated:
+            raise ValueError("empty response")
+        return generated
+    
+    @staticmethod
+    def _call_pollinations(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[str]:
+        return QuickListAI._post_request(QuickListAI._request_pollinations(prompt, max_tokens, temperature, json_mode))
+    
+    @staticmethod
+    def _request_huggingface(model: str, prompt: str, max_tokens: int, temperature: float, timeout: float) -> Dict:
+        headers = {"Content-Type": "application/json"}
+        token = get_secret("huggingface", "api_key")
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return {
+            "url": provider_url("huggingface", f"/models/{model}"),
+            "headers": headers,
+            "json": {
+                "inputs": prompt,
+                "parameters": {"max_new_tokens": max_tokens, "temperature": temperature, "return_full_text": False}
+            },
+            "timeout": timeout,
+            "parse": QuickListAI._parse_huggingface_response
+        }
+    
+    @staticmethod
+    def _parse_huggingface_response(response) -> str:
+        response.raise_for_status()
+        result = response.json()
+        generated = result[0].get('generated_text', '') if isinstance(result, list) else result.get('generated_text', '')
+        if not generated:
+            raise ValueError("empty response")
+        return generated
+    
+    @staticmethod
+    def _request_hf_qwen(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Dict:
+        # TIER 5: HuggingFace Qwen
+        return QuickListAI._request_huggingface("Qwen/Qwen2.5-72B-Instruct", prompt, max_tokens, temperature, 25)
+    
+    @staticmethod
+    def _call_hf_qwen(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[str]:
+        return QuickListAI._post_request(QuickListAI._request_hf_qwen(prompt, max_tokens, temperature, json_mode))
+    
+    @staticmethod
+    def _request_hf_mistral(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Dict:
+        # TIER 6: HuggingFace Mistral
+        return QuickListAI._request_huggingface("mistralai/Mistral-7B-Instruct-v0.3", prompt,
+                                                min(max_tokens, 600), temperature, 20)
+    
+    @staticmethod
+    def _call_hf_mistral(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Optional[str]:
+        return QuickListAI._post_request(QuickListAI._request_hf_mistral(prompt, max_tokens, temperature, json_mode))
+    
+    COLOR_FIX_PROMPT = """Rewrite this product description sentence so the only color it mentions is {color}. Change nothing else. Reply with the rewritten sentence only.
+
+{sentence}"""
+    
+    @staticmethod
+    def _rewrite_sentences(text: str, color: str, validator: ColorValidator) -> str:
+        """text with each off-color sentence rewritten by a short fix-up prompt"""
+        parts = re.split(r"(?<=[.!?])(\s+)", text)
+        for i, sentence in enumerate(parts):
+            if not validator.violations(sentence, color):
+                continue
+            prompt = QuickListAI.COLOR_FIX_PROMPT.format(color=color, sentence=sentence.strip())
+            for provider in QuickListAI.LLM_TIERS:
+                try:
+                    fixed = QuickListAI._call_llm(provider, prompt, max_tokens=120, temperature=0.2, json_mode=False,
+                                                 kind="repair")
+                except Exception as e:
+                    logger.warning(f"{QuickListAI.LLM_LABELS[provider]} color fix failed: {e}")
+                    continue
+                if fixed is None:
+                    continue
+                fixed = fixed.strip().strip('"')
+                if fixed and not validator.violations(fixed, color):
+                    parts[i] = fixed
+                break
+        return "".join(parts)
+    
+    @staticmethod
+    def _repair_colors(text: str, color: str, validator: ColorValidator, mode: str) -> Optional[str]:
+        """text with off-color words fixed, or None when it cannot be
+        
+        mode "substitute" swaps each offending word for the detected color,
+        "prompt" first asks an LLM to rewrite just the offending sentences,
+        "off" rejects outright.
+        """
+        found = validator.violations(text, color)
+        if not found:
+            return text
+        if mode == "off":
+            return None
+        if mode == "prompt":
+            text = QuickListAI._rewrite_sentences(text, color, validator)
+            found = validator.violations(text, color)
+        repaired = validator.substitute(text, color, found)
+        return None if validator.violations(repaired, color) else repaired
+    
+    @staticmethod
+    def _parse_description(parsed: Dict, provider: str, product_name: str, color: str,
+                           elapsed: float = 0.0) -> ProductDescription:
+        """Validated ProductDescription from a parsed LLM response
+        
+        elapsed is the provider time the response took, charged to the
+        tier's validation stats if it has to be thrown away.
+        """
+        if not isinstance(parsed.get('description'), str) or not parsed['description'].strip():
+            raise ValueError("Response has no description")
+        
+        # VALIDATION: Check for off-color words in output, repairing them where possible
+        title = parsed.get('title', product_name)
+        description = parsed['description']
+        validator = get_taxonomy().color_validator
+        found = validator.violations(title + "\n" + description, color)
+        if found:
+            logger.warning(f"⚠️ {QuickListAI.LLM_LABELS[provider]} COLOR HALLUCINATION DETECTED: "
+                  f"{', '.join(sorted({mention.term for mention in found}))}")
+            mode = QuickListAI._llm_settings()["color_repair"]
+            title = QuickListAI._repair_colors(title, color, validator, mode)
+            description = QuickListAI._repair_colors(description, color, validator, mode)
+            if title is None or description is None:
+                get_validation_stats().record(provider, "rejected", elapsed)
+                raise ValueError("Color validation failed")
+            get_validation_stats().record(provider, "repaired")
+        else:
+            get_validation_stats().record(provider, "clean")
+        
+        return ProductDescription(
+            title=title,
+            description=description,
+            bullet_points=parsed.get('bullet_points', [])[:5],
+            meta_description=parsed.get('meta_description', '')[:160]
+        )
+    
+    @staticmethod
+    async def _parse_description_async(parsed: Dict, provider: str, product_name: str, color: str,
+                                       elapsed: float = 0.0) -> ProductDescription:
+        """_parse_description, moved off the loop when repairs make their own LLM calls"""
+        if QuickListAI._llm_settings()["color_repair"] == "prompt":
+            return await asyncio.get_running_loop().run_in_executor(
+                get_io_executor(), QuickListAI._parse_description, parsed, provider, product_name, color, elapsed
+            )
+        return QuickListAI._parse_description(parsed, provider, product_name, color, elapsed)
+    
+    @staticmethod
+    def _clean_keywords(primary: List[str], long_tail: List[str]) -> Optional[Dict[str, List[str]]]:
+        """Normalized keyword lists, or None when too few survive"""
+        primary_kw = [kw.lower().strip() for kw in primary[:8] if kw.strip()]
+        long_tail_kw = [kw.lower().strip() for kw in long_tail[:12] if kw.strip()]
+        
+        if len(primary_kw) >= 5 and len(long_tail_kw) >= 8:
+            return {'primary': primary_kw, 'long_tail': long_tail_kw}
+        return None
+    
+    @staticmethod
+    def _describe_with(provider: str, prompt: str, product_name: str, color: str,
+                       stream: "ListingStream" = None) -> Optional[ProductDescription]:
+        """One LLM tier's validated listing; None when the tier is skipped"""
+        started = time.perf_counter()
+        generated = QuickListAI._call_llm(provider, prompt, on_text=stream.writer(provider) if stream else None,
+                                          kind="description")
+        if generated is None:
+            return None
+        
+        parsed = QuickListAI.parse_json_response(generated, provider, LISTING_KEYS)
+        return QuickListAI._parse_description(parsed, provider, product_name, color,
+                                              time.perf_counter() - started)
+    
+    @staticmethod
+    async def _describe_with_async(provider: str, prompt: str, product_name: str,
+                                   color: str) -> Optional[ProductDescription]:
+        """_describe_with from the event loop"""
+        started = time.perf_counter()
+        generated = await QuickListAI._call_llm_async(provider, prompt, kind="description")
+        if generated is None:
+            return None
+        
+        parsed = QuickListAI.parse_json_response(generated, provider, LISTING_KEYS)
+        return await QuickListAI._parse_description_async(parsed, provider, product_name, color,
+                                                          time.perf_counter() - started)
+    
+    @staticmethod
+    def _listing_with(provider: str, prompt: str, product_name: str, color: str,
+                      stream: "ListingStream" = None) -> Optional[tuple]:
+        """One LLM tier's (description, keywords) from the combined prompt
+        
+        keywords is None when the keyword lists fail validation; the
+        description alone is still usable.
+        """
+        started = time.perf_counter()
+        generated = QuickListAI._call_llm(provider, prompt, max_tokens=1100,
+                                          on_text=stream.writer(provider) if stream else None, kind="listing")
+        if generated is None:
+            return None
+        
+        parsed = QuickListAI.parse_json_response(generated, provider, LISTING_KEYS)
+        description = QuickListAI._parse_description(parsed, provider, product_name, color,
+                                                     time.perf_counter() - started)
+        keywords = QuickListAI._clean_keywords(parsed.get('primary_keywords', []),
+                                               parsed.get('long_tail_keywords', []))
+        return description, keywords
+    
+    @staticmethod
+    def _hedge_settings() -> Dict:
+        """[hedge] secrets: enabled, quantile, default_delay_seconds, min_delay_seconds, budget"""
+        settings = secrets_section("hedge")
+        return {
+            "enabled": bool(settings.get("enabled", False)),
+            "quantile": float(settings.get("quantile", 0.9)),
+            "default_delay_seconds": float(settings.get("default_delay_seconds", 6.0)),
+            "min_delay_seconds": float(settings.get("min_delay_seconds", 0.5)),
+            "budget": float(settings.get("budget", 0.2)),
+        }
+    
+    @staticmethod
+    def _hedge_delay(provider: str, settings: Dict, kind: str) -> float:
+        """How long to wait on provider before hedging: its observed latency quantile
+        
+        Read from the series of the call being hedged (description or
+        listing), so short keyword, repair and probe calls do not pull it down.
+        """
+        observed = get_circuit_breaker(provider).latency_quantile(settings["quantile"], kind)
+        if observed is None:
+            return settings["default_delay_seconds"]
+        return max(settings["min_delay_seconds"], observed)
+    
+    @staticmethod
+    def _next_hedge_target(tiers: List[str]) -> Optional[str]:
+        """First of the remaining tiers that can take a hedge, dropping the ones before it
+        
+        A hedge to a tier that is unconfigured or whose circuit is not
+        closed would come back empty at once and waste the budget.
+        """
+        while tiers:
+            provider = tiers[0]
+            if get_circuit_breaker(provider).state == CircuitBreaker.CLOSED and \
+                    getattr(QuickListAI, f"_request_{provider}")("", 1, 0.0, False) is not None:
+                return provider
+            tiers.pop(0)
+        return None
+    
+    @staticmethod
+    def _generate_hedged(attempt: Callable[[str], object], settings: Dict, kind: str):
+        """Walk the LLM tiers, hedging once to the next tier when the current one is slow
+        
+        attempt(provider) returns a validated result, None when
+        the tier is skipped, or raises. Tiers that fail or are skipped hand
+        over to the next one immediately. If the in-flight tier has not
+        answered by its hedge delay, the next tier that can answer is
+        started alongside it (budget permitting) and the first validated
+        answer wins; a hedge that comes back empty while the primary is
+        still out hands over to the tier after it. The loser is cancelled
+        if not yet started and otherwise ignored. kind picks the latency
+        series the hedge delay is read from.
+        """
+        executor = get_io_executor()
+        hedge_stats = get_hedge_stats()
+        hedge_stats.start_request()
+        tiers = list(QuickListAI.LLM_TIERS)
+        pending = {}
+        hedged = False
+        hedge_future = None
+        
+        def launch():
+            if not tiers:
+                return None
+            future = executor.submit(attempt, tiers[0])
+            pending[future] = tiers.pop(0)
+            return future
+        
+        launch()
+        while pending:
+            timeout = None
+            if not hedged:
+                oldest = next(iter(pending.values()))
+                timeout = QuickListAI._hedge_delay(oldest, settings, kind)
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            if not done:
+                hedged = True
+                if QuickListAI._next_hedge_target(tiers) and hedge_stats.try_hedge(settings["budget"]):
+                    hedge_future = launch()
+                    logger.info(f"Hedging {pending[hedge_future]} after {timeout:.1f}s")
+                continue
+            
+            hedge_lost = False
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"{QuickListAI.LLM_LABELS[provider]} failed: {e}")
+                    result = None
+                if result is not None:
+                    hedge_stats.record_win(provider, future is hedge_future)
+                    for loser in pending:
+                        loser.cancel()
+                    return result
+                hedge_lost = hedge_lost or future is hedge_future
+            
+            if not pending:
+                launch()
+            elif hedge_lost and QuickListAI._next_hedge_target(tiers):
+                hedge_future = launch()
+                logger.info(f"Hedging {pending[hedge_future]} in place of {provider}")
+        return None
+    
+    @staticmethod
+    async def _generate_hedged_async(attempt: Callable[[str], Awaitable], settings: Dict, kind: str):
+        """_generate_hedged on the event loop; the loser is cancelled outright"""
+        hedge_stats = get_hedge_stats()
+        hedge_stats.start_request()
+        tiers = list(QuickListAI.LLM_TIERS)
+        pending = {}
+        hedged = False
+        hedge_task = None
+        
+        def launch():
+            if not tiers:
+                return None
+            task = asyncio.ensure_future(attempt(tiers[0]))
+            pending[task] = tiers.pop(0)
+            return task
+        
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if not hedged:
+                    oldest = next(iter(pending.values()))
+                    timeout = QuickListAI._hedge_delay(oldest, settings, kind)
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    hedged = True
+                    if QuickListAI._next_hedge_target(tiers) and hedge_stats.try_hedge(settings["budget"]):
+                        hedge_task = launch()
+                        logger.info(f"Hedging {pending[hedge_task]} after {timeout:.1f}s")
+                    continue
+                
+                hedge_lost = False
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning(f"{QuickListAI.LLM_LABELS[provider]} failed: {e}")
+                        result = None
+                    if result is not None:
+                        hedge_stats.record_win(provider, task is hedge_task)
+                        return result
+                    hedge_lost = hedge_lost or task is hedge_task
+                
+                if not pending:
+                    launch()
+                elif hedge_lost and QuickListAI._next_hedge_target(tiers):
+                    hedge_task = launch()
+                    logger.info(f"Hedging {pending[hedge_task]} in place of {provider}")
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    @staticmethod
+    def _run_llm_tiers(attempt: Callable[[str], object], stream: "ListingStream" = None,
+                       events: "ProgressEvents" = None, stage: str = ""):
+        """First validated attempt(provider) across the LLM tiers, or None
+        
+        events receives provider events tagged with stage.
+        """
+        if stream is not None:
+            attempt = QuickListAI._releasing(attempt, stream)
+        if events is not None:
+            attempt = QuickListAI._reporting(attempt, events, stage)
+        
+        hedge = QuickListAI._hedge_settings()
+        if hedge["enabled"]:
+            return QuickListAI._generate_hedged(attempt, hedge, stage)
+        
+        for provider in QuickListAI.LLM_TIERS:
+            try:
+                result = attempt(provider)
+                if result is not None:
+                    return result
+            except Exception as e:
+                logger.warning(f"{QuickListAI.LLM_LABELS[provider]} failed: {e}")
+        return None
+    
+    @staticmethod
+    async def _run_llm_tiers_async(attempt: Callable[[str], Awaitable], events: "ProgressEvents" = None,
+                                   stage: str = ""):
+        """_run_llm_tiers for coroutine attempts"""
+        if events is not None:
+            attempt = QuickListAI._reporting_async(attempt, events, stage)
+        
+        hedge = QuickListAI._hedge_settings()
+        if hedge["enabled"]:
+            return await QuickListAI._generate_hedged_async(attempt, hedge, stage)
+        
+        for provider in QuickListAI.LLM_TIERS:
+            try:
+                result = await attempt(provider)
+                if result is not None:
+                    return result
+            except Exception as e:
+                logger.warning(f"{QuickListAI.LLM_LABELS[provider]} failed: {e}")
+        return None
+    
+    @staticmethod
+    def _reporting(attempt: Callable[[str], object], events: "ProgressEvents",
+                   stage: str) -> Callable[[str], object]:
+        """attempt that publishes what happens to each tier it is called for"""
+        def wrapped(provider: str):
+            events.publish("provider_attempted", stage, provider)
+            try:
+                result = attempt(provider)
+            except Exception as e:
+                events.publish("provider_failed", stage, provider, str(e))
+                raise
+            events.publish("provider_skipped" if result is None else "validated", stage, provider)
+            return result
+        return wrapped
+    
+    @staticmethod
+    def _reporting_async(attempt: Callable[[str], Awaitable], events: "ProgressEvents",
+                         stage: str) -> Callable[[str], Awaitable]:
+        """_reporting for coroutine attempts"""
+        async def wrapped(provider: str):
+            events.publish("provider_attempted", stage, provider)
+            try:
+                result = await attempt(provider)
+            except Exception as e:
+                events.publish("provider_failed", stage, provider, str(e))
+                raise
+            events.publish("provider_skipped" if result is None else "validated", stage, provider)
+            return result
+        return wrapped
+    
+    @staticmethod
+    def _releasing(attempt: Callable[[str], object], stream: "ListingStream") -> Callable[[str], object]:
+        """attempt that hands the streamed display to the next tier when it fails"""
+        def wrapped(provider: str):
+            try:
+                result = attempt(provider)
+            except Exception:
+                stream.release(provider)
+                raise
+            if result is None:
+                stream.release(provider)
+            return result
+        return wrapped
+    
+    @staticmethod
+    def _llm_settings() -> Dict:
+        """[llm] secrets: combined = true makes one structured call per listing;
+        color_repair is "substitute" (default), "prompt" or "off"
+        """
+        settings = secrets_section("llm")
+        return {
+            "combined": bool(settings.get("combined", False)),
+            "color_repair": str(settings.get("color_repair", "substitute")),
+        }
+    
+    @staticmethod
+    def _description_prompt(product_name: str, analysis: ProductAnalysis, features: str,
+                            target_audience: str = "", price: str = "", with_keywords: bool = False) -> tuple:
+        """(prompt, detected color, forbidden colors) for listing generation"""
+        
+        color = analysis.colors[0] if analysis.colors[0] != "neutral" else ""
+        
+        # Build context with STRICT instructions
+        context = f"""Product: {product_name}
+Category: {analysis.category}
+Type: {analysis.specific_type}
+DETECTED COLOR: {color if color else 'NOT SPECIFIED'}
+Style: {analysis.style}
+Materials: {', '.join(analysis.materials)}
+Features: {features if features else 'Premium quality'}"""
+        
+        if target_audience:
+            context += f"\nTarget Audience: {target_audience}"
+        if price:
+            context += f"\nPrice: {price}"
+        
+        # STRICT VALIDATION: Build list of FORBIDDEN colors (all colors except detected one)
+        all_colors = ['red', 'blue', 'green', 'yellow', 'orange', 'purple', 'pink', 'brown', 'white', 'black', 'gray', 'grey', 'beige', 'navy', 'maroon', 'burgundy', 'crimson', 'scarlet']
+        forbidden_colors = [c for c in all_colors if c != color.lower()] if color else []
+        
+        schema = '{"title": "compelling product title", "description": "engaging professional description", "bullet_points": ["key benefit 1", "key benefit 2", "key benefit 3", "key benefit 4", "key benefit 5"], "meta_description": "SEO meta under 160 chars"'
+        keyword_rules = ""
+        if with_keywords:
+            schema += ', "primary_keywords": ["keyword1", "keyword2", ...], "long_tail_keywords": ["long phrase 1", "long phrase 2", ...]'
+            keyword_rules = """Also generate SEO keywords:
+- primary_keywords (8): specific product identifiers, brand-style terms, material+product combos
+- long_tail_keywords (12): detailed search phrases people actually use when shopping, with purchase intent or resale/secondhand terms where relevant
+
+"""
+        schema += '}'
+        
+        # Create EXTREMELY strict prompt
+        prompt = f"""Write a professional e-commerce product description for this {analysis.specific_type.lower()}.
+
+{context}
+
+CRITICAL RULES - FOLLOW EXACTLY:
+1. COLOR: {"Use ONLY '" + color + "' as the color. DO NOT mention: " + ", ".join(forbidden_colors) if color else "Do NOT mention any specific color"}
+2. MATERIALS: Use ONLY these materials: {', '.join(analysis.materials)}
+3. STYLE: Use ONLY this style: {analysis.style}
+4. Write 150-200 words that balance emotional appeal with practical benefits
+5. DO NOT use em dashes (—) - use regular hyphens (-) or periods instead
+6. {"Consider the price point of " + price + " in your tone" if price else ""}
+
+DO NOT invent colors, materials, or attributes not listed above.
+
+{keyword_rules}Respond ONLY with valid JSON (no markdown, no extra text):
+{schema}"""
+        return prompt, color, forbidden_colors
+    
+    @staticmethod
+    def _template_description(product_name: str, analysis: ProductAnalysis, features: str,
+                              color: str) -> ProductDescription:
+        """Simple template using ONLY detected attributes"""
+        # Don't duplicate color if it's already in product name
+        color_text = ""
+        if color and color.lower() not in product_name.lower():
+            color_text = f"{color} "
+        
+        # Build description using ONLY detected attributes
+        desc_parts = []
+        desc_parts.append(f"Experience exceptional quality with this {color_text}{product_name.lower()}.")
+        
+        if analysis.materials and analysis.materials[0] not in ["Premium", "Quality"]:
+            desc_parts.append(f"Crafted from {analysis.materials[0].lower()}, this {analysis.specific_type.lower()} combines durability with comfort.")
+        
+        if analysis.style:
+            desc_parts.append(f"Features {analysis.style.lower()} design that stands out.")
+        
+        if features:
+            desc_parts.append(features)
+        else:
+            desc_parts.append("Perfect for any occasion.")
+        
+        final_description = " ".join(desc_parts)
+        
+        # Build bullet points using ONLY detected attributes
+        bullet_points = []
+        
+        if analysis.materials and analysis.materials[0] not in ["Premium", "Quality"]:
+            bullet_points.append(f"{analysis.materials[0]} construction for durability")
+        else:
+            bullet_points.append("Premium quality construction")
+        
+        if analysis.style:
+            bullet_points.append(f"{analysis.style} design that stands out")
+        
+        if color:
+            bullet_points.append(f"Beautiful {color} styling")
+        else:
+            bullet_points.append("Classic styling")
+        
+        bullet_points.append("Quality craftsmanship ensures long-lasting wear")
+        bullet_points.append("Perfect addition to your collection")
+        
+        return ProductDescription(
+            title=f"{analysis.style} {color_text}{product_name}".strip(),
+            description=final_description,
+            bullet_points=bullet_points,
+            meta_description=f"{product_name} - {analysis.style} {analysis.specific_type.lower()}"[:160]
+        )
+    
+    @staticmethod
+    def generate_description(product_name: str, analysis: ProductAnalysis, 
+                            features: str, image: Union[Image.Image, PreparedImage],
+                            target_audience: str = "", price: str = "",
+                            on_partial: Callable[[Dict], None] = None,
+                            events: ProgressEvents = None) -> ProductDescription:
+        """Generate ONE professional description using multi-AI fallback
+        
+        on_partial(fields) receives title / description / bullet_points as
+        they stream in from tiers that support streaming (called from a
+        worker thread). events receives a provider event per tier tried.
+        """
+        
+        prompt, color, _ = QuickListAI._description_prompt(
+            product_name, analysis, features, target_audience, price
+        )
+        stream = ListingStream(on_partial) if on_partial else None
+        
+        # Try multiple AI services (open circuits are skipped instantly)
+        result = QuickListAI._run_llm_tiers(
+            lambda provider: QuickListAI._describe_with(provider, prompt, product_name, color, stream),
+            stream, events, "description"
+        )
+        if result is not None:
+            return result
+        
+        # FINAL FALLBACK: Simple template using ONLY detected attributes
+        return QuickListAI._template_description(product_name, analysis, features, color)
+    
+    @staticmethod
+    async def generate_description_async(product_name: str, analysis: ProductAnalysis,
+                                         features: str, image: Union[Image.Image, PreparedImage] = None,
+                                         target_audience: str = "", price: str = "",
+                                         events: ProgressEvents = None) -> ProductDescription:
+        """generate_description for asyncio callers: same tiers, validation and template fallback
+        
+        Nothing streams; events are published from the loop's thread.
+        """
+        prompt, color, _ = QuickListAI._description_prompt(
+            product_name, analysis, features, target_audience, price
+        )
+        result = await QuickListAI._run_llm_tiers_async(
+            lambda provider: QuickListAI._describe_with_async(provider, prompt, product_name, color),
+            events, "description"
+        )
+        if result is not None:
+            return result
+        return QuickListAI._template_description(product_name, analysis, features, color)
+    
+    @staticmethod
+    def generate_listing(product_name: str, analysis: ProductAnalysis,
+                         features: str, image: Union[Image.Image, PreparedImage],
+                         target_audience: str = "", price: str = "",
+                         on_partial: Callable[[Dict], None] = None,
+                         events: ProgressEvents = None) -> tuple:
+        """Description and keywords from ONE structured LLM call
+        
+        Same tiers, color validation and template fallbacks as
+        generate_description and extract_keywords. Keywords that fail
+        validation fall back to the template set instead of costing a
+        second round trip.
+        """
+        prompt, color, _ = QuickListAI._description_prompt(
+            product_name, analysis, features, target_audience, price, with_keywords=True
+        )
+        stream = ListingStream(on_partial) if on_partial else None
+        
+        result = QuickListAI._run_llm_tiers(
+            lambda provider: QuickListAI._listing_with(provider, prompt, product_name, color, stream),
+            stream, events, "listing"
+        )
+        if result is None:
+            description, keywords = QuickListAI._template_description(product_name, analysis, features, color), None
+        else:
+            description, keywords = result
+        
+        if keywords is None:
+            keywords = QuickListAI._template_keywords(product_name, analysis)
+        return description, keywords
+    
+    @staticmethod
+    def extract_keywords(product_name: str, analysis: ProductAnalysis, description: str,
+                         fallback: Dict[str, List[str]] = None,
+                         events: ProgressEvents = None) -> Dict[str, List[str]]:
+        """Generate SEO keywords using AI for better specificity
+        
+        fallback: precomputed template keywords, used instead of rebuilding them
+        """
+        
+        # Try AI-powered keyword generation first
+        try:
+            if get_groq_client() is not None:
+                prompt = QuickListAI._keywords_prompt(product_name, analysis, description)
+                
+                def attempt(provider: str) -> Optional[Dict[str, List[str]]]:
+                    generated = QuickListAI._call_llm(provider, prompt, max_tokens=400, temperature=0.6,
+                                                      kind="keywords")
+                    return QuickListAI._parse_keywords(generated, provider)
+                
+                if events is not None:
+                    attempt = QuickListAI._reporting(attempt, events, "keywords")
+                keywords = attempt("groq")
+                if keywords is not None:
+                    return keywords
+        except Exception as e:
+            logger.warning(f"AI keyword generation failed: {e}")
+            pass
+        
+        if fallback is not None:
+            return fallback
+        return QuickListAI._template_keywords(product_name, analysis)
+    
+    @staticmethod
+    async def extract_keywords_async(product_name: str, analysis: ProductAnalysis, description: str,
+                                     fallback: Dict[str, List[str]] = None,
+                                     events: ProgressEvents = None) -> Dict[str, List[str]]:
+        """extract_keywords for asyncio callers: same Groq call, validation and fallbacks"""
+        try:
+            if get_secret("groq", "api_key"):
+                prompt = QuickListAI._keywords_prompt(product_name, analysis, description)
+                
+                async def attempt(provider: str) -> Optional[Dict[str, List[str]]]:
+                    generated = await QuickListAI._call_llm_async(provider, prompt, max_tokens=400,
+                                                                  temperature=0.6, kind="keywords")
+                    return QuickListAI._parse_keywords(generated, provider)
+                
+                if events is not None:
+                    attempt = QuickListAI._reporting_async(attempt, events, "keywords")
+                keywords = await attempt("groq")
+                if keywords is not None:
+                    return keywords
+        except Exception as e:
+            logger.warning(f"AI keyword generation failed: {e}")
+        
+        if fallback is not None:
+            return fallback
+        return QuickListAI._template_keywords(product_name, analysis)
+    
+    @staticmethod
+    def _keywords_prompt(product_name: str, analysis: ProductAnalysis, description: str) -> str:
+        category = analysis.category.lower()
+        style = analysis.style.lower()
+        material = analysis.materials[0].lower()
+        color = analysis.colors[0] if analysis.colors[0] != "neutral" else ""
+        specific = analysis.specific_type.lower()
+        
+        return f"""Generate SEO keywords for this product:
+Product: {product_name}
+Category: {category}
+Type: {specific}
+Color: {color if color else 'not specified'}
+Style: {style}
+Material: {material}
+Description: {description[:200]}
+
+Generate 2 lists:
+1. Primary keywords (8 keywords): Specific product identifiers, brand-style terms, material+product combos
+2. Long-tail keywords (12 keywords): Detailed search phrases people actually use when shopping
+
+Focus on:
+- Actual shopping search terms (not generic)
+- Specific attributes (color, material, style)
+- Purchase intent phrases
+- Resale/secondhand market terms where relevant
+
+Respond ONLY with JSON:
+{{"primary": ["keyword1", "keyword2", ...], "long_tail": ["long phrase 1", "long phrase 2", ...]}}"""
+    
+    @staticmethod
+    def _parse_keywords(generated: Optional[str], provider: str) -> Optional[Dict[str, List[str]]]:
+        """Validated keywords from a raw response; None when the tier was skipped"""
+        if generated is None:
+            return None
+        result = QuickListAI.parse_json_response(generated, provider, ("primary", "long_tail"))
+        
+        # Validate and clean keywords
+        keywords = QuickListAI._clean_keywords(result.get('primary', []), result.get('long_tail', []))
+        if keywords is None:
+            raise ValueError("Too few keywords")
+        return keywords
+    
+    @staticmethod
+    def _template_keywords(product_name: str, analysis: ProductAnalysis) -> Dict[str, List[str]]:
+        """Enhanced template-based keyword generation"""
+        base = product_name.lower()
+        category = analysis.category.lower()
+        style = analysis.style.lower()
+        material = analysis.materials[0].lower()
+        color = analysis.colors[0] if analysis.colors[0] != "neutral" else ""
+        specific = analysis.specific_type.lower()
+        
+        primary = [base]
+        
+        # Add specific color+product combinations
+        if color and color not in base:
+            primary.append(f"{color} {base}")
+            if specific and specific != base:
+                primary.append(f"{color} {specific}")
+        
+        # Add style combinations
+        if style and style not in ["modern", "premium"]:
+            primary.append(f"{style} {base}")
+            if color:
+                primary.append(f"{style} {color} {specific}")
+        
+        # Add material combinations if meaningful
+        if material and material not in ["premium", "quality", "fabric"] and material not in base:
+            primary.append(f"{material} {base}")
+            if color:
+                primary.append(f"{color} {material} {base}")
+        
+        # Add category-specific terms
+        if category != "product" and specific and specific not in base:
+            primary.append(f"{specific} {category.split()[0].lower()}")
+        
+        # Add resale-specific terms
+        primary.extend([
+            f"pre-owned {base}",
+            f"secondhand {base}"
+        ])
+        
+        # Remove duplicates, keep first 8
+        primary = list(dict.fromkeys(primary[:8]))
+        
+        # Long-tail: More specific shopping intent
+        long_tail = []
+        
+        # Purchase intent
+        long_tail.extend([
+            f"buy {base} online",
+            f"where to buy {base}",
+            f"{base} for sale near me"
+        ])
+        
+        # Color-specific
+        if color and color not in base:
+            long_tail.extend([
+                f"{color} {base} for sale",
+                f"best {color} {specific} online",
+                f"buy {color} {base} secondhand"
+            ])
+        
+        # Style-specific
+        if style and style not in ["modern", "premium"]:
+            long_tail.extend([
+                f"{style} {base} reviews",
+                f"best {style} {specific}",
+                f"affordable {style} {base}"
+            ])
+        
+        # Material-specific
+        if material and material not in ["premium", "quality", "fabric"]:
+            long_tail.extend([
+                f"{material} {base} online",
+                f"buy {material} {specific}"
+            ])
+        
+        # Resale/sustainable
+        long_tail.extend([
+            f"sustainable {base}",
+            f"eco-friendly {specific}",
+            f"thrift {base} online"
+        ])
+        
+        # Quality/condition
+        long_tail.extend([
+            f"high quality {base}",
+            f"gently used {base}",
+            f"like new {specific}"
+        ])
+        
+        # Remove duplicates, keep first 12
+        long_tail = list(dict.fromkeys(long_tail[:12]))
+        
+        return {'primary': primary, 'long_tail': long_tail}
+
+
+def format_for_platform(description: ProductDescription, keywords: Dict, platform: str) -> str:
+    """Format listing for platform"""
+    
+    if platform == "Shopify":
+        return f"""PRODUCT TITLE:
+{description.title}
+
+DESCRIPTION:
+{description.description}
+
+KEY FEATURES:
+{chr(10).join(['• ' + bp for bp in description.bullet_points])}
+
+META DESCRIPTION:
+{description.meta_description}
+
+PRODUCT TAGS:
+{', '.join(keywords['primary'][:10])}
+
+SEO KEYWORDS:
+{', '.join(keywords['long_tail'][:8])}"""
+    
+    elif platform == "Amazon":
+        return f"""PRODUCT TITLE (max 200 characters):
+{description.title[:200]}
+
+BULLET POINTS (5 maximum):
+{chr(10).join(['• ' + bp for bp in description.bullet_points[:5]])}
+
+PRODUCT DESCRIPTION:
+{description.description[:2000]}
+
+BACKEND SEARCH TERMS:
+{', '.join(keywords['primary'][:7])}
+
+ADDITIONAL KEYWORDS:
+{', '.join(keywords['long_tail'][:10])}"""
+    
+    elif platform == "Etsy":
+        return f"""LISTING TITLE (max 140 characters):
+{description.title[:140]}
+
+ABOUT THIS ITEM:
+{description.description}
+
+ITEM DETAILS:
+{chr(10).join(['• ' + bp for bp in description.bullet_points])}
+
+TAGS (max 13 tags):
+{', '.join(keywords['primary'][:13])}
+
+SHOP SECTION:
+{keywords['primary'][0] if keywords['primary'] else 'Products'}"""
+    
+    else:  # WooCommerce
+        return f"""PRODUCT NAME:
+{description.title}
+
+SHORT DESCRIPTION:
+{description.meta_description}
+
+FULL DESCRIPTION:
+{description.description}
+
+PRODUCT FEATURES:
+{chr(10).join(['• ' + bp for bp in description.bullet_points])}
+
+SEO TITLE:
+{description.title}
+
+SEO META DESCRIPTION:
+{description.meta_description}
+
+FOCUS KEYWORDS:
+{', '.join(keywords['primary'][:5])}"""
+
+
+PLATFORMS = ["Shopify", "Amazon", "Etsy", "WooCommerce"]
+
+
+def _resolve_product_name(product_name: str, analysis: ProductAnalysis) -> str:
+    """Operator-entered name, else one derived from the detected type"""
+    if product_name:
+        return product_name
+    return f"{analysis.specific_type}" if analysis.specific_type != "Item" else analysis.category
+
+
+def build_listing_pipeline(combined: bool = False, on_partial: Callable[[Dict], None] = None,
+                           events: ProgressEvents = None) -> Pipeline:
+    """Listing generation as a stage graph
+    
+    Inputs: image (PreparedImage), product_name, features, target_audience,
+    price. Local color extraction runs while the vision tiers are in
+    flight (the tiers then reuse the memoized result), template keywords
+    are ready before the AI keyword call returns, and every platform
+    format is rendered at once. on_partial receives streamed listing
+    fields from the generation stage and events the provider events of
+    the LLM stages (pass events.on_stage to Pipeline.run for the stage
+    events).
+    """
+    stages = [
+        Stage("colors", lambda image: (image.dominant_color, image.palette), ("image",), ("colors",)),
+        Stage("analysis", QuickListAI.analyze_with_vision_apis, ("image", "product_name"), ("analysis",)),
+        Stage("name", _resolve_product_name, ("product_name", "analysis"), ("name",)),
+    ]
+    if combined:
+        stages.append(Stage("listing", lambda *args: QuickListAI.generate_listing(*args, on_partial=on_partial, events=events),
+                            ("name", "analysis", "features", "image", "target_audience", "price"),
+                            ("description", "keywords")))
+    else:
+        stages += [
+            Stage("template_keywords", QuickListAI._template_keywords, ("name", "analysis"), ("template_keywords",)),
+            Stage("description", lambda *args: QuickListAI.generate_description(*args, on_partial=on_partial, events=events),
+                  ("name", "analysis", "features", "image", "target_audience", "price"), ("description",)),
+            Stage("keywords", lambda name, analysis, description, fallback:
+                  QuickListAI.extract_keywords(name, analysis, description.description, fallback, events),
+                  ("name", "analysis", "description", "template_keywords"), ("keywords",)),
+        ]
+    stages.append(Stage("formatted", lambda description, keywords:
+                        {platform: format_for_platform(description, keywords, platform) for platform in PLATFORMS},
+                        ("description", "keywords"), ("formatted",)))
+    return Pipeline(stages)
+
+
+def listing_record(values: Dict) -> Dict:
+    """JSON-ready listing from the values of a listing pipeline run"""
+    return {
+        "product_name": values["name"],
+        "analysis": dataclasses.asdict(values["analysis"]),
+        "description": dataclasses.asdict(values["description"]),
+        "keywords": values["keywords"],
+    }
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+@dataclass
+class BatchItem:
+    """One photo of an intake batch, with optional operator fields"""
+    source: str  # file path or upload name
+    data: Optional[bytes] = None  # upload bytes; files are read when processed
+    product_name: str = ""
+    price: str = ""
+    features: str = ""
+    target_audience: str = ""
+    
+    def read(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        with open(self.source, "rb") as f:
+            return f.read()
+    
+    @cached_property
+    def key(self) -> str:
+        """Stable id for resuming: the photo bytes plus the fields that shape its listing"""
+        digest = hashlib.sha1(self.read())
+        for value in (self.product_name, self.price, self.features, self.target_audience):
+            digest.update(b"\0" + value.encode("utf-8"))
+        return digest.hexdigest()[:20]
+
+
+def load_folder(path: str) -> List[BatchItem]:
+    """Every JPEG / PNG directly inside a folder, in name order"""
+    return [BatchItem(os.path.join(path, name)) for name in sorted(os.listdir(path))
+            if name.lower().endswith(IMAGE_EXTENSIONS)]
+
+
+def load_manifest(path: str) -> List[BatchItem]:
+    """Items from a CSV manifest
+    
+    Needs an image (or path) column; name, price, features and
+    target_audience are optional. Relative image paths are resolved
+    against the manifest's folder.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+            image = row.get("image") or row.get("path")
+            if not image:
+                raise ValueError(f"{path}:{line}: no image path")
+            items.append(BatchItem(
+                source=os.path.join(base, image),
+                product_name=row.get("name") or row.get("product_name", ""),
+                price=row.get("price", ""),
+                features=row.get("features", ""),
+                target_audience=row.get("target_audience", ""),
+            ))
+    return items
+
+
+class BatchUpdate(NamedTuple):
+    index: int
+    status: str  # queued, skipped, running, done or failed
+    detail: str = ""
+    record: Optional[Dict] = None
+
+
+class BatchRunner:
+    """Runs intake items through the listing pipeline into a resumable JSONL file
+    
+    Each finished item is appended as one JSON line as soon as it is done,
+    so a crashed or interrupted run picks up where it stopped: items whose
+    key already has a "done" line are skipped, failed ones are retried.
+    At most `concurrency` items are in flight at once.
+    
+    With processes > 0 the CPU-bound image work (decode, EXIF, resize,
+    encoding, color analysis) runs in that many worker processes, so it
+    scales past the GIL; provider calls stay on threads. 0 keeps it on the
+    item threads.
+    """
+    
+    def __init__(self, output_path: str, concurrency: int = 4, combined: bool = False, processes: int = 0):
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self.combined = combined
+        self.processes = max(0, processes)
+        self._write_lock = threading.Lock()
+    
+    def completed(self) -> set:
+        """Keys with a "done" record in the output file"""
+        done = set()
+        if not os.path.exists(self.output_path):
+            return done
+        with open(self.output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if record.get("status") == "done":
+                    done.add(record.get("key"))
+        return done
+    
+    def _write(self, record: Dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+    
+    @staticmethod
+    def _prepare(item: BatchItem, image_pool: Optional[ProcessPoolExecutor]) -> PreparedImage:
+        if image_pool is None:
+            return PreparedImage(Image.open(io.BytesIO(item.read())))
+        # Files are read by the worker; only uploads cross the pipe
+        source = item.source if item.data is None else item.data
+        return PreparedImage.from_state(image_pool.submit(prepare_image_state, source).result())
+    
+    def _process(self, index: int, item: BatchItem, stage_executor: ThreadPoolExecutor,
+                 updates: "queue.Queue", image_pool: Optional[ProcessPoolExecutor] = None) -> Dict:
+        started = time.perf_counter()
+        record = {"key": item.key, "source": item.source}
+        try:
+            events = ProgressEvents()
+            events.subscribe(lambda event: updates.put(BatchUpdate(index, "running", event.describe())))
+            pipeline = build_listing_pipeline(self.combined, events=events)
+            values, trace = pipeline.run(
+                {
+                    "image": self._prepare(item, image_pool),
+                    "product_name": item.product_name,
+                    "features": item.features,
+                    "target_audience": item.target_audience,
+                    "price": item.price,
+                },
+                executor=stage_executor,
+                on_stage=events.on_stage
+            )
+            record.update(listing_record(values), status="done")
+        except Exception as e:
+            record.update({"status": "failed", "error": repr(e)})
+        record["seconds"] = round(time.perf_counter() - started, 3)
+        self._write(record)
+        return record
+    
+    def run(self, items: List[BatchItem], on_update: Callable[[BatchUpdate], None] = None,
+            on_idle: Callable[[], None] = None, poll_interval: float = 0.2) -> Dict[str, int]:
+        """Process items; returns counts by final status
+        
+        on_update(update) is called on the calling thread for every status
+        change, so it may update Streamlit. on_idle() is called at least
+        every poll_interval seconds while items run.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        updates = queue.Queue()
+        counts = {"done": 0, "failed": 0, "skipped": 0}
+        
+        def deliver():
+            while not updates.empty():
+                update = updates.get_nowait()
+                if on_update:
+                    on_update(update)
+        
+        completed = self.completed()
+        pending = []
+        for index, item in enumerate(items):
+            try:
+                finished = item.key in completed
+            except OSError as e:
+                updates.put(BatchUpdate(index, "failed", repr(e)))
+                counts["failed"] += 1
+                continue
+            if finished:
+                updates.put(BatchUpdate(index, "skipped", "already in output"))
+                counts["skipped"] += 1
+            else:
+                updates.put(BatchUpdate(index, "queued"))
+                pending.append(index)
+        deliver()
+        
+        # Items wait on their stages, so stages get a pool of their own
+        image_pool = image_process_pool(self.processes) if self.processes and pending else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="quicklist-batch") as item_pool, \
+                    ThreadPoolExecutor(max_workers=self.concurrency * 4,
+                                       thread_name_prefix="quicklist-batch-stage") as stage_pool:
+                running = {
+                    item_pool.submit(self._process, index, items[index], stage_pool, updates, image_pool): index
+                    for index in pending
+                }
+                while running:
+                    done, _ = wait(list(running), timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = running.pop(future)
+                        record = future.result()
+                        counts[record["status"]] += 1
+                        updates.put(BatchUpdate(index, record["status"], record.get("error", ""), record))
+                    deliver()
+                    if on_idle:
+                        on_idle()
+        finally:
+            if image_pool is not None:
+                image_pool.shutdown(cancel_futures=True)
+        return counts
@@ -0,0 +1,418 @@
+"""QuickList HTTP service: one process serving every intake station on the LAN
+
+    python service.py [--host 0.0.0.0] [--port 8080] [--workers 8]
+
+All stations share this process's provider clients, connection pools,
+circuit breakers, hedging budget and analysis cache. Work runs on one
+bounded worker pool: requests beyond --workers wait their turn, and
+past --queue more the service answers 503 with Retry-After so stations
+back off instead of piling up.
+
+JSON in, JSON out. Images travel base64-encoded in "image".
+
+    GET  /health           provider breakers, cache, hedging and validation stats
+    POST /analyze          {image, product_name?} -> analysis
+    POST /generate         {image or analysis, product_name?, features?, target_audience?, price?}
+                           -> {product_name, description}
+    POST /keywords         {analysis, description, product_name?} -> keywords
+    POST /format           {description, keywords, platform?} -> {platform: text}
+    POST /listing          /analyze + /generate + /keywords + /format in one pipeline run
+    POST /batches          {items: [{image, product_name?, price?, features?, target_audience?}]} -> {id}
+    GET  /batches/<id>     per-item status, and the finished records
+
+Batches run one at a time, --batch-concurrency items in flight, into a
+resumable JSONL file under the cache directory. Past --batch-queue
+unfinished batches /batches answers 503 too. Finished batches are kept
+in memory for an hour (at most MAX_FINISHED_BATCHES of them) and are
+then answered from their JSONL file. Point provider tiers at
+local stubs with [<provider>] base_url or QUICKLIST_<PROVIDER>_BASE_URL
+(see benchmarks/stub_providers.py).
+"""
+import argparse
+import base64
+import dataclasses
+import io
+import json
+import os
+import sys
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import quicklist
+from quicklist import (
+    CACHE_DIR, PLATFORMS, BatchItem, BatchRunner, Image, PreparedImage, ProductAnalysis, ProductDescription,
+    QuickListAI, build_listing_pipeline, format_for_platform, listing_record,
+)
+
+MAX_BODY_BYTES = 32 * 1024 * 1024
+FINISHED_BATCH_TTL = 3600.0  # seconds a finished batch stays in memory
+MAX_FINISHED_BATCHES = 64
+BATCH_ID = re.compile(r"[0-9a-f]{12}")
+
+
+class RequestError(Exception):
+    """Client mistake, answered with its status code"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def decode_image(body: dict) -> PreparedImage:
+    if not body.get("image"):
+        raise RequestError("image is required")
+    if not isinstance(body["image"], str):
+        raise RequestError("image must be a base64 string")
+    try:
+        data = base64.b64decode(body["image"], validate=True)
+        return PreparedImage(Image.open(io.BytesIO(data)))
+    except (ValueError, OSError) as e:  # binascii.Error is a ValueError, as is non-ASCII text
+        raise RequestError(f"image is not a base64 JPEG or PNG: {e}")
+
+
+def decode_analysis(body: dict) -> ProductAnalysis:
+    try:
+        return ProductAnalysis(**body["analysis"])
+    except (KeyError, TypeError) as e:
+        raise RequestError(f"analysis is missing or malformed: {e}")
+
+
+def decode_description(body: dict) -> ProductDescription:
+    try:
+        return ProductDescription(**body["description"])
+    except (KeyError, TypeError) as e:
+        raise RequestError(f"description is missing or malformed: {e}")
+
+
+def resolve_name(body: dict, analysis: ProductAnalysis) -> str:
+    return quicklist._resolve_product_name(str(body.get("product_name", "")).strip(), analysis)
+
+
+class ListingService:
+    """Endpoint logic, independent of the HTTP plumbing"""
+
+    def __init__(self, workers: int = 8, queue_limit: int = 64, batch_concurrency: int = 4,
+                 batch_processes: int = 0, batch_queue_limit: int = 4):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quicklist-service")
+        self.queue_limit = workers + queue_limit
+        self.batch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quicklist-service-batch")
+        self.batch_concurrency = batch_concurrency
+        self.batch_processes = batch_processes
+        self.batch_queue_limit = batch_queue_limit
+        self.batch_dir = os.path.join(CACHE_DIR, "service", "batches")
+        self.batches = {}
+        self._lock = threading.Lock()
+        self.inflight = 0
+
+    def submit(self, func, *args):
+        """Run func on the shared pool and wait for it; RequestError 503 when the queue is full"""
+        with self._lock:
+            if self.inflight >= self.queue_limit:
+                raise RequestError("busy, retry shortly", 503)
+            self.inflight += 1
+        try:
+            return self.pool.submit(func, *args).result()
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+    def health(self) -> dict:
+        stats = {
+            "inflight": self.inflight,
+            "breakers": quicklist.circuit_breaker_stats(),
+            "hedging": quicklist.get_hedge_stats().stats(),
+            "validation": quicklist.get_validation_stats().stats(),
+            "streaming": quicklist.get_stream_stats().stats(),
+            "http": quicklist.get_http_pool().stats(),
+        }
+        try:
+            stats["analysis_cache"] = quicklist.get_analysis_cache().stats()
+        except Exception as e:
+            stats["analysis_cache"] = {"error": repr(e)}
+        return stats
+
+    def analyze(self, body: dict) -> dict:
+        image = decode_image(body)
+        analysis = QuickListAI.analyze_with_vision_apis(image, str(body.get("product_name", "")).strip())
+        return dataclasses.asdict(analysis)
+
+    def generate(self, body: dict) -> dict:
+        image = None
+        if "analysis" in body:
+            analysis = decode_analysis(body)
+        else:
+            image = decode_image(body)
+            analysis = QuickListAI.analyze_with_vision_apis(image, str(body.get("product_name", "")).strip())
+        name = resolve_name(body, analysis)
+        description = QuickListAI.generate_description(
+            name, analysis, body.get("features", ""), image,
+            body.get("target_audience", ""), body.get("price", "")
+        )
+        return {"product_name": name, "description": dataclasses.asdict(description)}
+
+    def keywords(self, body: dict) -> dict:
+        analysis = decode_analysis(body)
+        description = decode_description(body)
+        return QuickListAI.extract_keywords(resolve_name(body, analysis), analysis, description.description)
+
+    def format(self, body: dict) -> dict:
+        description = decode_description(body)
+        keywords = body.get("keywords")
+        if not isinstance(keywords, dict) or "primary" not in keywords or "long_tail" not in keywords:
+            raise RequestError("keywords needs primary and long_tail lists")
+        platforms = [body["platform"]] if body.get("platform") else PLATFORMS
+        unknown = [platform for platform in platforms if platform not in PLATFORMS]
+        if unknown:
+            raise RequestError(f"unknown platform {unknown[0]}; one of {', '.join(PLATFORMS)}")
+        return {platform: format_for_platform(description, keywords, platform) for platform in platforms}
+
+    def listing(self, body: dict) -> dict:
+        pipeline = build_listing_pipeline(QuickListAI._llm_settings()["combined"])
+        values, trace = pipeline.run({
+            "image": decode_image(body),
+            "product_name": str(body.get("product_name", "")).strip(),
+            "features": body.get("features", ""),
+            "target_audience": body.get("target_audience", ""),
+            "price": body.get("price", ""),
+        })
+        record = listing_record(values)
+        record["formatted"] = values["formatted"]
+        record["seconds"] = round(trace.total_seconds, 3)
+        return record
+
+    def _unfinished_batches(self) -> int:
+        return sum(batch["status"] in ("queued", "running") for batch in self.batches.values())
+
+    def _evict_batches(self) -> None:
+        """Drop finished batches past the TTL or the count cap (oldest first); call with the lock held"""
+        finished = sorted((batch["finished_at"], batch_id) for batch_id, batch in self.batches.items()
+                          if batch.get("finished_at") is not None)
+        cutoff = time.monotonic() - FINISHED_BATCH_TTL
+        excess = len(finished) - MAX_FINISHED_BATCHES
+        for n, (finished_at, batch_id) in enumerate(finished):
+            if finished_at < cutoff or n < excess:
+                del self.batches[batch_id]
+
+    def submit_batch(self, body: dict) -> dict:
+        with self._lock:
+            if self._unfinished_batches() >= self.batch_queue_limit:
+                raise RequestError("too many batches waiting, retry shortly", 503)
+        entries = body.get("items")
+        if not isinstance(entries, list) or not entries:
+            raise RequestError("items must be a non-empty list")
+        items = []
+        for number, entry in enumerate(entries, start=1):
+            try:
+                data = base64.b64decode(entry["image"], validate=True)
+            except (KeyError, TypeError, ValueError) as e:
+                raise RequestError(f"item {number}: image is missing or not base64: {e}")
+            items.append(BatchItem(
+                source=str(entry.get("source") or f"item-{number}"),
+                data=data,
+                product_name=str(entry.get("product_name", "")),
+                price=str(entry.get("price", "")),
+                features=str(entry.get("features", "")),
+                target_audience=str(entry.get("target_audience", "")),
+            ))
+
+        batch_id = uuid.uuid4().hex[:12]
+        batch = {
+            "id": batch_id,
+            "status": "queued",
+            "items": [{"source": item.source, "status": "queued", "detail": ""} for item in items],
+            "records": {},
+            "counts": None,
+        }
+        with self._lock:
+            if self._unfinished_batches() >= self.batch_queue_limit:
+                raise RequestError("too many batches waiting, retry shortly", 503)
+            self._evict_batches()
+            self.batches[batch_id] = batch
+        self.batch_pool.submit(self._run_batch, batch, items)
+        return {"id": batch_id, "items": len(items)}
+
+    def _run_batch(self, batch: dict, items: list) -> None:
+        def on_update(update):
+            with self._lock:
+                row = batch["items"][update.index]
+                row["status"] = update.status
+                row["detail"] = update.detail
+                if update.record is not None:
+                    batch["records"][update.index] = update.record
+
+        batch["status"] = "running"
+        try:
+            runner = BatchRunner(self._batch_path(batch["id"]), self.batch_concurrency,
+                                 QuickListAI._llm_settings()["combined"], self.batch_processes)
+            counts = runner.run(items, on_update=on_update)
+            with self._lock:
+                batch["counts"] = counts
+                batch["status"] = "done"
+        except Exception as e:
+            print(f"Batch {batch['id']} failed: {e}")
+            with self._lock:
+                batch["status"] = "failed"
+                batch["error"] = repr(e)
+        with self._lock:
+            batch["finished_at"] = time.monotonic()
+
+    def _batch_path(self, batch_id: str) -> str:
+        return os.path.join(self.batch_dir, f"{batch_id}.jsonl")
+
+    def _batch_from_file(self, batch_id: str) -> dict:
+        """Status of an evicted batch, rebuilt from its JSONL records"""
+        path = self._batch_path(batch_id)
+        if not BATCH_ID.fullmatch(batch_id) or not os.path.exists(path):
+            raise RequestError(f"no batch {batch_id}", 404)
+        records = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # a line cut short by a crash
+        counts = {"done": 0, "failed": 0, "skipped": 0}
+        for record in records:
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+        return {
+            "id": batch_id,
+            "status": "done",
+            "counts": counts,
+            "error": "",
+            "items": [{"source": record.get("source", ""), "status": record["status"],
+                       "detail": record.get("error", ""), "record": record} for record in records],
+        }
+
+    def batch_status(self, batch_id: str) -> dict:
+        with self._lock:
+            self._evict_batches()
+            batch = self.batches.get(batch_id)
+            if batch is not None:
+                return {
+                    "id": batch["id"],
+                    "status": batch["status"],
+                    "counts": batch["counts"],
+                    "error": batch.get("error", ""),
+                    "items": [dict(row, record=batch["records"].get(index))
+                              for index, row in enumerate(batch["items"])],
+                }
+        return self._batch_from_file(batch_id)
+
+
+def make_handler(service: ListingService):
+    posts = {
+        "/analyze": service.analyze,
+        "/generate": service.generate,
+        "/keywords": service.keywords,
+        "/format": service.format,
+        "/listing": service.listing,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive for stations that reuse connections
+
+        def send_json(self, status: int, payload) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            if status == 503:
+                self.send_header("Retry-After", "2")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def respond(self, func, *args) -> None:
+            try:
+                self.send_json(200, func(*args))
+            except RequestError as e:
+                self.send_json(e.status, {"error": str(e)})
+            except Exception as e:
+                print(f"{self.command} {self.path} failed: {e!r}")
+                self.send_json(500, {"error": repr(e)})
+
+        def read_body(self) -> dict:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                raise RequestError("Content-Length is not a number")
+            if length < 0:
+                raise RequestError("Content-Length is negative")
+            if length > MAX_BODY_BYTES:
+                raise RequestError("request body too large", 413)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                raise RequestError(f"body is not JSON: {e}")
+            if not isinstance(body, dict):
+                raise RequestError("body must be a JSON object")
+            return body
+
+        def do_GET(self):
+            if self.path == "/health":
+                self.respond(service.health)
+            elif self.path.startswith("/batches/"):
+                self.respond(service.batch_status, self.path[len("/batches/"):])
+            else:
+                self.send_json(404, {"error": f"no route {self.path}"})
+
+        def do_POST(self):
+            try:
+                body = self.read_body()
+            except RequestError as e:
+                self.close_connection = True  # the unread body would be taken for the next request
+                self.send_json(e.status, {"error": str(e)})
+                return
+            if self.path == "/batches":
+                self.respond(service.submit_batch, body)
+            elif self.path in posts:
+                self.respond(service.submit, posts[self.path], body)
+            else:
+                self.send_json(404, {"error": f"no route {self.path}"})
+
+        def log_message(self, format, *args):
+            print(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, workers: int = 8, queue_limit: int = 64,
+          batch_concurrency: int = 4, batch_processes: int = 0, batch_queue_limit: int = 4) -> ThreadingHTTPServer:
+    """Bound (not yet serving) HTTP server; call serve_forever() on it"""
+    service = ListingService(workers, queue_limit, batch_concurrency, batch_processes, batch_queue_limit)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="QuickList HTTP service for intake stations")
+    parser.add_argument("--host", default="127.0.0.1", help="0.0.0.0 to serve the LAN")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=8, help="requests worked on at once")
+    parser.add_argument("--queue", type=int, default=64, help="requests allowed to wait before 503")
+    parser.add_argument("--batch-concurrency", type=int, default=4, help="items in flight per batch")
+    parser.add_argument("--batch-processes", type=int, default=0,
+                        help="worker processes for batch image work (0: on the batch threads)")
+    parser.add_argument("--batch-queue", type=int, default=4, help="unfinished batches allowed before 503")
+    args = parser.parse_args(argv)
+
+    quicklist.enable_logging()
+    server = serve(args.host, args.port, args.workers, args.queue, args.batch_concurrency, args.batch_processes,
+                   args.batch_queue)
+    print(f"QuickList service on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())